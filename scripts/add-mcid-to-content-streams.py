@@ -23,10 +23,12 @@ def extract_text_with_positions(doc):
     Returns a list of text blocks with their content stream positions
     """
     text_blocks = []
+    # Text spans only: image blocks (and their pixel data) are never looked at
+    flags = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
     
     for page_num in range(len(doc)):
         page = doc[page_num]
-        text_dict = page.get_text("dict")
+        text_dict = page.get_text("dict", flags=flags)
         
         for block in text_dict.get("blocks", []):
             if "lines" in block:
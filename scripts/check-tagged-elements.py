@@ -23,42 +23,18 @@ try:
         print(f"[OK] MarkInfo: {has_markinfo}")
         
         if has_markinfo:
-            markinfo = pdf.Root['/MarkInfo']
-            try:
-                if hasattr(markinfo, 'objgen'):
-                    markinfo_dict = pdf.get_object(markinfo.objgen)
-                else:
-                    markinfo_dict = markinfo
-            except:
-                markinfo_dict = markinfo
-            marked = markinfo_dict.get('/Marked', 'Not set')
+            # pikepdf dereferences indirect objects on access, so no get_object() round-trips
+            marked = pdf.Root['/MarkInfo'].get('/Marked', 'Not set')
             print(f"[OK] Marked: {marked}")
         
         if has_struct:
-            struct = pdf.Root['/StructTreeRoot']
-            try:
-                if hasattr(struct, 'objgen'):
-                    struct_obj = pdf.get_object(struct.objgen)
-                else:
-                    struct_obj = struct
-            except:
-                struct_obj = struct
-            
-            k_array = struct_obj.get('/K', [])
+            k_array = pdf.Root['/StructTreeRoot'].get('/K', [])
             print(f"\nStructure Elements Found: {len(k_array)}\n")
             
             # Count by type
             element_types = {}
             
-            def count_elements(elem, depth=0):
-                try:
-                    if hasattr(elem, 'objgen'):
-                        elem_obj = pdf.get_object(elem.objgen)
-                    else:
-                        elem_obj = elem
-                except:
-                    elem_obj = elem
-                
+            def count_elements(elem_obj, depth=0):
                 if isinstance(elem_obj, pikepdf.Dictionary):
                     s_type = elem_obj.get('/S')
                     if s_type:
@@ -82,14 +58,13 @@ try:
                         info_str = f" ({', '.join(info)})" if info else ""
                         print(f"{indent}- {s_str}{info_str}")
                     
-                    # Recurse into children
+                    # Recurse into children; they arrive resolved, and MCIDs and other
+                    # non-dictionaries are skipped by count_elements (a lone kid may be stored bare)
                     k_children = elem_obj.get('/K', [])
+                    if isinstance(k_children, pikepdf.Dictionary):
+                        k_children = [k_children]
                     for child in k_children:
-                        try:
-                            if hasattr(child, 'objgen') or isinstance(child, pikepdf.Dictionary):
-                                count_elements(child, depth + 1)
-                        except:
-                            pass
+                        count_elements(child, depth + 1)
             
             for elem in k_array:
                 count_elements(elem)
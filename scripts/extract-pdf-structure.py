@@ -5,8 +5,11 @@ Extract PDF Structure Tree using PyMuPDF
 This script extracts the structure tree, language attributes, and tags from a PDF
 """
 
+import os
+import re
 import sys
 import json
+import traceback
 import fitz  # PyMuPDF
 try:
     import pikepdf
@@ -73,7 +76,6 @@ def extract_structure_tree(pdf_path: str) -> dict:
                     if isinstance(struct_root_xref, str):
                         try:
                             # Handle PDF reference format like "6 0 R" - extract the number
-                            import re
                             match = re.match(r'(\d+)', struct_root_xref.strip())
                             if match:
                                 struct_root_xref = int(match.group(1))
@@ -161,7 +163,6 @@ def extract_structure_tree(pdf_path: str) -> dict:
                         try:
                             if isinstance(struct_root_xref, str):
                                 # Handle PDF reference format like "6 0 R" - extract the number
-                                import re
                                 match = re.match(r'(\d+)', struct_root_xref.strip())
                                 if match:
                                     struct_root_xref = int(match.group(1))
@@ -188,6 +189,14 @@ def extract_structure_tree(pdf_path: str) -> dict:
                                 if '/StructTreeRoot' in pdf.Root:
                                     struct_tree_root = pdf.Root['/StructTreeRoot']
                                     
+                                    # Page object -> 1-based page number, for elements' /Pg
+                                    page_numbers = {page.obj.objgen: i + 1 for i, page in enumerate(pdf.pages)}
+                                    
+                                    def pikepdf_page_number(pg):
+                                        if not isinstance(pg, pikepdf.Dictionary):
+                                            return None
+                                        return page_numbers.get(pg.objgen)
+                                    
                                     # Recursively extract structure tree using pikepdf
                                     def extract_pikepdf_structure(elem, depth=0, max_depth=20):
                                         """Extract structure element from pikepdf object"""
@@ -226,7 +235,11 @@ def extract_structure_tree(pdf_path: str) -> dict:
                                             if '/Lang' in elem_obj:
                                                 lang = str(elem_obj['/Lang'])
                                             
-                                            # Extract MCID from MCR objects in K array
+                                            # Page of the element's content (/Pg); an MCR's own /Pg is used if absent
+                                            page = pikepdf_page_number(elem_obj.get('/Pg'))
+                                            
+                                            # Extract MCID from bare integer kids (compact form, page from /Pg)
+                                            # or from MCR objects in K array
                                             mcid = None
                                             children = []
                                             k_array = elem_obj.get('/K', [])
@@ -238,14 +251,16 @@ def extract_structure_tree(pdf_path: str) -> dict:
                                                     'type': tag_type,
                                                     'text': text,
                                                     'mcid': int(k_array),
+                                                    'page': page,
                                                     'children': [],
                                                     'lang': lang
                                                 }
                                             
                                             for kid in k_array:
-                                                # Handle bare MCID integer (direct MCID, not a dictionary)
+                                                # Bare MCID integer: marked content on the element's /Pg page
                                                 if isinstance(kid, int):
-                                                    # This is a direct MCID reference - skip or handle as needed
+                                                    if mcid is None:
+                                                        mcid = int(kid)
                                                     continue
                                                 
                                                 # Get the actual object if it's an indirect reference
@@ -264,6 +279,8 @@ def extract_structure_tree(pdf_path: str) -> dict:
                                                         if kid_mcid is not None:
                                                             if mcid is None:
                                                                 mcid = int(kid_mcid) if isinstance(kid_mcid, (int, float)) else kid_mcid
+                                                            if page is None:
+                                                                page = pikepdf_page_number(kid_obj.get('/Pg'))
                                                     else:
                                                         # It's a child structure element
                                                         child_data = extract_pikepdf_structure(kid, depth + 1, max_depth)
@@ -282,14 +299,16 @@ def extract_structure_tree(pdf_path: str) -> dict:
                                                     "Language": lang,
                                                     "MCID": mcid
                                                 } if lang or mcid is not None else {},
+                                                "page": page,
                                                 "children": children if children else []
                                             }
                                             
                                             return node_data
                                         except Exception as e:
-                                            print(f"DEBUG: Error extracting pikepdf element at depth {depth}: {e}", file=sys.stderr)
-                                            import traceback
-                                            traceback.print_exc(file=sys.stderr)
+                                            # Per-element path: report (with traceback) only when debugging
+                                            if os.getenv('PDFUA_DEBUG'):
+                                                print(f"DEBUG: Error extracting pikepdf element at depth {depth}: {e}", file=sys.stderr)
+                                                traceback.print_exc(file=sys.stderr)
                                             return None
                                     
                                     # Extract all root children
@@ -341,7 +360,6 @@ def extract_structure_tree(pdf_path: str) -> dict:
                                     }
                         except Exception as e:
                             print(f"DEBUG: pikepdf structure tree extraction failed: {e}", file=sys.stderr)
-                            import traceback
                             traceback.print_exc(file=sys.stderr)
                             pass
                 
@@ -355,6 +373,18 @@ def extract_structure_tree(pdf_path: str) -> dict:
                         "message": "StructTreeRoot found but could not extract structure elements"
                     }
                 
+                # Page xref -> 1-based page number, for elements' /Pg
+                page_numbers_by_xref = {doc.page_xref(i): i + 1 for i in range(len(doc))}
+                
+                def fitz_page_number(pg_ref):
+                    """1-based page number of a /Pg reference (xref int or "N 0 R"), else None"""
+                    if isinstance(pg_ref, str):
+                        match = re.match(r'(\d+)', pg_ref.strip())
+                        pg_ref = int(match.group(1)) if match else None
+                    elif isinstance(pg_ref, tuple) and pg_ref:
+                        pg_ref = pg_ref[0]
+                    return page_numbers_by_xref.get(pg_ref) if isinstance(pg_ref, int) else None
+                
                 # Recursively extract structure elements
                 def extract_from_pdf_object(obj_ref, depth=0, max_depth=20):
                     """Extract structure tree from PDF object reference"""
@@ -368,7 +398,6 @@ def extract_structure_tree(pdf_path: str) -> dict:
                             try:
                                 if isinstance(obj_ref, str):
                                     # Handle PDF reference format like "6 0 R" - extract the number
-                                    import re
                                     match = re.match(r'(\d+)', obj_ref.strip())
                                     if match:
                                         obj_xref = int(match.group(1))
@@ -450,13 +479,23 @@ def extract_structure_tree(pdf_path: str) -> dict:
                                 except:
                                     page_num = None
                             
+                            # Page of the element's content (/Pg) takes precedence over the P guess
+                            pg_page = fitz_page_number(obj.get('Pg'))
+                            if pg_page is not None:
+                                page_num = pg_page
+                            
                             # Get children (K - Kids array)
                             kids = obj.get('K', [])
                             children = []
-                            mcid = None  # Extract MCID from MCR objects in K array
+                            mcid = None  # Extract MCID from bare integer kids or MCR objects in K array
                             
                             if isinstance(kids, list):
                                 for kid_ref in kids:
+                                    # With /Pg on the element, integer kids are MCIDs (compact form)
+                                    if pg_page is not None and isinstance(kid_ref, int):
+                                        if mcid is None:
+                                            mcid = kid_ref
+                                        continue
                                     if kid_ref:
                                         # Check if this is an MCR (Marked Content Reference) object
                                         try:
@@ -720,7 +759,6 @@ def extract_structure_tree(pdf_path: str) -> dict:
             }
         
     except Exception as e:
-        import traceback
         return {
             "success": False,
             "structureTree": [],
@@ -739,5 +777,7 @@ if __name__ == "__main__":
     
     pdf_path = sys.argv[1]
     result = extract_structure_tree(pdf_path)
-    print(json.dumps(result, indent=2))
+    # Stream the (possibly large) tree to stdout instead of building the whole string first
+    json.dump(result, sys.stdout, indent=2)
+    sys.stdout.write('\n')
     sys.exit(0 if result["success"] else 1)
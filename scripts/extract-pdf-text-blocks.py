@@ -20,12 +20,14 @@ try:
     try:
         doc = fitz.open(pdf_path)
         text_blocks = []
+        # Text spans only: image blocks (and their pixel data) are never looked at
+        flags = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
         
         for page_num in range(len(doc)):
             page = doc[page_num]
             
             # Get text blocks with font information
-            text_dict = page.get_text("dict")
+            text_dict = page.get_text("dict", flags=flags)
             
             for block in text_dict.get("blocks", []):
                 if "lines" in block:
@@ -16,8 +16,12 @@ if sys.stderr.encoding != 'utf-8':
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace', line_buffering=True)
 
 import argparse
+import contextlib
+import functools
+import hashlib
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 try:
@@ -27,6 +31,16 @@ except ImportError:
     print("ERROR: pikepdf not installed. Run: pip install pikepdf", file=sys.stderr)
     sys.exit(1)
 
+try:
+    import orjson  # optional: faster JSON encode/decode
+except ImportError:
+    orjson = None
+
+try:
+    import ijson  # optional: stream large fixes files instead of loading them whole
+except ImportError:
+    ijson = None
+
 # ---------------------------------------------------------------------------
 # Language map
 # ---------------------------------------------------------------------------
@@ -44,27 +58,111 @@ LANG_NAME_MAP = {
     'es': 'Spanish', 'sv': 'Swedish', 'tr': 'Turkish', 'uk': 'Ukrainian',
 }
 
+@functools.lru_cache(maxsize=64)
+def _lang_name_for(lang_code):
+    """Display name for a language code, falling back to its base subtag, then English."""
+    base = lang_code.split('-')[0].split('_')[0]
+    return LANG_NAME_MAP.get(lang_code) or LANG_NAME_MAP.get(base, 'English')
+
+
+@functools.lru_cache(maxsize=64)
+def _lang_strings(lang_code, lang_name):
+    """Wrapped (lang_code, lang_name) PDF strings, built once per language."""
+    return String(lang_code), String(lang_name)
+
+
+# Structure /Type values that point at content rather than child elements
+CONTENT_REF_TYPES = frozenset({'MCR', 'OBJR'})
+# Table row-group wrappers searched for the header row
+TABLE_SECTION_TAGS = frozenset({'THead', 'TBody'})
+DOCUMENT_TAGS = frozenset({'Document', 'document'})
+# Fix types that supply a Figure's alt text
+IMAGE_FIX_TYPES = frozenset({'altText', 'imageOfText'})
+# Names built once for the per-element rebuild paths
+HEADING_TAGS = tuple(Name(f'/H{level}') for level in range(1, 7))
+FIGURE_TAG = Name('/Figure')
+IMAGE_SUBTYPE = Name('/Image')
+
+# Max characters of page text sent to Claude for language detection
+LANG_SAMPLE_CHARS = 800
+
+# Large image sets are sent to Claude in parallel batches instead of one huge prompt
+ALT_TEXT_BATCH_THRESHOLD = 500
+ALT_TEXT_BATCH_SIZE = 100
+ALT_TEXT_BATCH_WORKERS = 5
+
+# XMP packet split around its only two variable spans (title, language)
+_XMP_PREFIX = b'''<?xpacket begin="" id="W5M0MpCehiHzreSzNTczkc9d"?>
+<x:xmpmeta xmlns:x="adobe:ns:meta/">
+ <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+  <rdf:Description rdf:about=""
+    xmlns:dc="http://purl.org/dc/elements/1.1/">
+   <dc:title><rdf:Alt><rdf:li xml:lang="x-default">'''
+_XMP_MID = b'''</rdf:li></rdf:Alt></dc:title>
+   <dc:language><rdf:Bag><rdf:li>'''
+_XMP_SUFFIX = b'''</rdf:li></rdf:Bag></dc:language>
+  </rdf:Description>
+ </rdf:RDF>
+</x:xmpmeta>
+<?xpacket end="w"?>'''
+
 
 # ===========================================================================
 # SHARED UTILITIES
 # ===========================================================================
 
+def _json_dumps(obj):
+    """Compact JSON text (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def _json_loads(text):
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+def _strip_code_fence(text):
+    """Body of the first ``` fence (json tag dropped); text without a fence is returned as-is."""
+    if '```' not in text:
+        return text
+    body = text.partition('```')[2].partition('```')[0]
+    return body[4:] if body.startswith('json') else body
+
+
+@functools.lru_cache(maxsize=1)
+def _claude_client():
+    """Shared Anthropic client (one connection pool per process); None without an API key."""
+    api_key = os.getenv('ANTHROPIC_API_KEY')
+    if not api_key:
+        return None
+    import anthropic
+    return anthropic.Anthropic(api_key=api_key)
+
+
 def detect_language_with_ai(pdf_path, title=None):
     try:
-        import anthropic, fitz
+        import fitz
         doc = fitz.open(pdf_path)
-        sample = ''.join(doc[i].get_text()[:500] for i in range(min(3, len(doc))))
+        # Dehyphenated text from the visible page area, stopping once the prompt cap is reached
+        flags = fitz.TEXTFLAGS_TEXT | fitz.TEXT_DEHYPHENATE
+        sample = ''
+        for i in range(min(3, len(doc))):
+            page = doc[i]
+            sample += page.get_text('text', clip=page.rect, flags=flags)[:500]
+            if len(sample) >= LANG_SAMPLE_CHARS:
+                sample = sample[:LANG_SAMPLE_CHARS]
+                break
         doc.close()
         if not sample.strip():
             return 'en'
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
+        client = _claude_client()
+        if client is None:
             return 'en'
-        client = anthropic.Anthropic(api_key=api_key)
         msg = client.messages.create(
             model='claude-sonnet-4-6', max_tokens=10,
             messages=[{'role': 'user', 'content':
-                f'Respond with ONLY the ISO 639-1 two-letter language code (e.g. en, fr, de):\n\nTitle: {title or ""}\n\n{sample[:800]}'}]
+                f'Respond with ONLY the ISO 639-1 two-letter language code (e.g. en, fr, de):\n\nTitle: {title or ""}\n\n{sample}'}]
         )
         code = msg.content[0].text.strip().lower()[:2]
         return code if code in LANG_NAME_MAP else 'en'
@@ -75,56 +173,144 @@ def detect_language_with_ai(pdf_path, title=None):
 
 def set_metadata(pdf, title, lang_code, lang_name):
     """Set title + language in all 4 required locations."""
+    lang_code_str, lang_name_str = _lang_strings(lang_code, lang_name)
+
     # 1. Root.Lang
-    pdf.Root[Name('/Lang')] = String(lang_code)
+    pdf.Root[Name('/Lang')] = lang_code_str
 
     # 2. Info dictionary (via trailer)
-    if '/Info' not in pdf.trailer or pdf.trailer['/Info'] is None:
-        pdf.trailer['/Info'] = pdf.make_indirect(Dictionary())
-    pdf.trailer['/Info'][Name('/Title')] = String(title)
+    info = pdf.trailer.get('/Info')
+    if info is None:
+        pdf.trailer['/Info'] = pdf.make_indirect(Dictionary(Title=String(title)))
+    else:
+        info[Name('/Title')] = String(title)
 
     # 3. ViewerPreferences
     if '/ViewerPreferences' not in pdf.Root:
         pdf.Root.ViewerPreferences = pdf.make_indirect(Dictionary())
     vp = pdf.Root.ViewerPreferences
     vp[Name('/DisplayDocTitle')] = True
-    vp[Name('/Language')] = String(lang_name)
+    vp[Name('/Language')] = lang_name_str
     vp[Name('/PrintArea')] = Name('/MediaBox')
     vp[Name('/ViewArea')] = Name('/MediaBox')
 
     # 4. XMP Metadata
     try:
-        xmp = f'''<?xpacket begin="" id="W5M0MpCehiHzreSzNTczkc9d"?>
-<x:xmpmeta xmlns:x="adobe:ns:meta/">
- <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
-  <rdf:Description rdf:about=""
-    xmlns:dc="http://purl.org/dc/elements/1.1/">
-   <dc:title><rdf:Alt><rdf:li xml:lang="x-default">{title}</rdf:li></rdf:Alt></dc:title>
-   <dc:language><rdf:Bag><rdf:li>{lang_code}</rdf:li></rdf:Bag></dc:language>
-  </rdf:Description>
- </rdf:RDF>
-</x:xmpmeta>
-<?xpacket end="w"?>'''
-        pdf.Root.Metadata = pdf.make_stream(xmp.encode('utf-8'))
-        pdf.Root.Metadata[Name('/Type')] = Name('/Metadata')
-        pdf.Root.Metadata[Name('/Subtype')] = Name('/XML')
+        xmp = _XMP_PREFIX + title.encode('utf-8') + _XMP_MID + lang_code.encode('utf-8') + _XMP_SUFFIX
+        pdf.Root.Metadata = pdf.make_stream(xmp, Type=Name('/Metadata'), Subtype=Name('/XML'))
     except Exception as e:
         print(f'  [WARN] XMP update failed: {e}')
 
     # Ensure MarkInfo.Marked
     if '/MarkInfo' not in pdf.Root:
-        pdf.Root.MarkInfo = Dictionary()
-    pdf.Root.MarkInfo.Marked = True
+        pdf.Root.MarkInfo = Dictionary(Marked=True)
+    else:
+        pdf.Root.MarkInfo.Marked = True
 
     print(f'[OK] Metadata: title="{title}", lang={lang_code} ({lang_name}), DisplayDocTitle=True')
 
 
-def fix_annotation_tagging(pdf):
+def _pages_with_annots(pdf):
+    """Indices of pages whose raw page dict has an /Annots key (nothing is resolved)."""
+    return [i for i, page in enumerate(pdf.pages) if '/Annots' in page.obj]
+
+
+def _collect_annotations(pdf, page_nums=None):
+    """Resolve every page annotation once -> list of (page_num, annot dict)."""
+    if page_nums is None:
+        page_nums = _pages_with_annots(pdf)
+    annotations = []
+    for page_num in page_nums:
+        annots = pdf.pages[page_num].obj.get('/Annots')
+        if not isinstance(annots, Array):
+            continue
+        for annot in annots:  # pikepdf dereferences indirect objects on access
+            try:
+                if isinstance(annot, Dictionary):
+                    annotations.append((page_num, annot))
+            except Exception as e:
+                print(f'  [WARN] Annotation on page {page_num + 1}: {e}')
+    return annotations
+
+
+def _fix_link_annot(annot, subtype, page_num):
+    if '/Contents' in annot:
+        return []
+    uri = ''
+    action = annot.get('/A')
+    if isinstance(action, Dictionary):
+        uri_obj = action.get('/URI')
+        if uri_obj is not None:
+            uri = str(uri_obj)
+    return [(Name('/Contents'), String(f'Link: {uri[:80]}' if uri else f'Link on page {page_num + 1}'))]
+
+
+def _fix_widget_annot(annot, subtype, page_num):
+    updates = []
+    tu = annot.get('/TU')
+    if tu is None:
+        field_name = annot.get('/T')
+        tu = String(str(field_name) if field_name is not None else f'Form field on page {page_num + 1}')
+        updates.append((Name('/TU'), tu))
+    if '/Contents' not in annot:
+        updates.append((Name('/Contents'), tu))
+    return updates
+
+
+def _fix_multimedia_annot(annot, subtype, page_num):
+    updates = []
+    label = f'Multimedia on page {page_num + 1}'
+    if '/Contents' not in annot:
+        updates.append((Name('/Contents'), String(label)))
+    if '/Alt' not in annot:
+        updates.append((Name('/Alt'), String(label)))
+    return updates
+
+
+def _fix_generic_annot(annot, subtype, page_num):
+    if '/Contents' in annot:
+        return []
+    return [(Name('/Contents'), String(f'{subtype} on page {page_num + 1}'))]
+
+
+# Annotation subtype (without leading '/') -> fixer returning [(key, value), ...] to write;
+# anything else gets _fix_generic_annot
+_ANNOT_FIXERS = {
+    'Link': _fix_link_annot,
+    'Widget': _fix_widget_annot,
+    'Screen': _fix_multimedia_annot,
+    'Movie': _fix_multimedia_annot,
+    'Sound': _fix_multimedia_annot,
+}
+
+
+def _plan_annot_fix(item):
+    """Inspect one (page_num, annot) without writing -> (needs_struct_parent, updates, error)."""
+    page_num, annot = item
+    try:
+        needs_sp = '/StructParent' not in annot
+    except Exception as e:
+        return False, [], e
+    try:
+        subtype = str(annot.get('/Subtype', '')).lstrip('/')
+        fixer = _ANNOT_FIXERS.get(subtype, _fix_generic_annot)
+        return needs_sp, fixer(annot, subtype, page_num), None
+    except Exception as e:
+        return needs_sp, [], e
+
+
+def fix_annotation_tagging(pdf, annotations=None):
     """Add /StructParent and /Contents to annotations missing them."""
+    if annotations is None:
+        annotations = _collect_annotations(pdf)
+    if not annotations:
+        # Nothing to tag (rebuild mode's StructureTreeBuilder already wrote the ParentTree)
+        print('[OK] Annotations: none to tag')
+        return 0
     fixed = 0
     sp_next = 0
-    if '/StructTreeRoot' in pdf.Root:
-        sr = pdf.Root.StructTreeRoot
+    sr = pdf.Root.get('/StructTreeRoot')  # resolved once, reused for the final write
+    if sr is not None:
         if '/ParentTree' not in sr:
             sr[Name('/ParentTree')] = pdf.make_indirect(Dictionary(Nums=Array([])))
         if '/ParentTreeNextKey' in sr:
@@ -133,55 +319,43 @@ def fix_annotation_tagging(pdf):
             except Exception:
                 pass
 
-    for page_num, page in enumerate(pdf.pages):
-        if '/Annots' not in page:
-            continue
-        annots = page['/Annots']
-        if not isinstance(annots, Array):
+    # An annotation listed twice (in one /Annots or on several pages) is one object:
+    # tag it once, or it would get a second /StructParent and parent-tree entry
+    seen = set()
+    unique = []
+    for item in annotations:
+        og = item[1].objgen
+        if og[0]:  # direct dictionaries (0, 0) can't be shared
+            if og in seen:
+                continue
+            seen.add(og)
+        unique.append(item)
+    annotations = unique
+
+    # Inspect every annotation first, then apply all writes in one ordered pass so
+    # /StructParent numbering stays deterministic. Sequential on purpose: pikepdf/QPDF
+    # objects of one Pdf must not be read from several threads
+    plans = map(_plan_annot_fix, annotations)
+
+    pending = []
+    for (page_num, annot), (needs_sp, updates, error) in zip(annotations, plans):
+        if needs_sp:
+            pending.append((page_num, annot, Name('/StructParent'), sp_next))  # Native int, not pikepdf.Integer
+            sp_next += 1
+        if error is not None:
+            print(f'  [WARN] Annotation on page {page_num + 1}: {error}')
             continue
-        for annot_ref in annots:
-            try:
-                annot = pdf.get_object(annot_ref.objgen) if hasattr(annot_ref, 'objgen') else annot_ref
-                if not isinstance(annot, Dictionary):
-                    continue
-                subtype = str(annot.get('/Subtype', '')).lstrip('/')
-
-                if '/StructParent' not in annot:
-                    annot[Name('/StructParent')] = sp_next  # Native int, not pikepdf.Integer
-                    sp_next += 1
-
-                if subtype == 'Link' and '/Contents' not in annot:
-                    uri = ''
-                    if '/A' in annot:
-                        action = annot['/A']
-                        if isinstance(action, Dictionary) and '/URI' in action:
-                            uri = str(action['/URI'])
-                    annot[Name('/Contents')] = String(f'Link: {uri[:80]}' if uri else f'Link on page {page_num + 1}')
-                    fixed += 1
-                elif subtype == 'Widget':
-                    if '/TU' not in annot:
-                        field_name = str(annot.get('/T', f'Form field on page {page_num + 1}'))
-                        annot[Name('/TU')] = String(field_name)
-                        fixed += 1
-                    if '/Contents' not in annot:
-                        annot[Name('/Contents')] = annot.get('/TU', String(f'Form field on page {page_num + 1}'))
-                        fixed += 1
-                elif subtype in ('Screen', 'Movie', 'Sound'):
-                    if '/Contents' not in annot:
-                        annot[Name('/Contents')] = String(f'Multimedia on page {page_num + 1}')
-                        fixed += 1
-                    if '/Alt' not in annot:
-                        annot[Name('/Alt')] = String(f'Multimedia on page {page_num + 1}')
-                        fixed += 1
-                else:
-                    if '/Contents' not in annot:
-                        annot[Name('/Contents')] = String(f'{subtype} on page {page_num + 1}')
-                        fixed += 1
-            except Exception as e:
-                print(f'  [WARN] Annotation on page {page_num + 1}: {e}')
+        fixed += len(updates)
+        pending.extend((page_num, annot, key, value) for key, value in updates)
+
+    for page_num, annot, key, value in pending:
+        try:
+            annot[key] = value
+        except Exception as e:
+            print(f'  [WARN] Annotation on page {page_num + 1}: {e}')
 
-    if '/StructTreeRoot' in pdf.Root:
-        pdf.Root.StructTreeRoot[Name('/ParentTreeNextKey')] = sp_next  # Native int
+    if sr is not None:
+        sr[Name('/ParentTreeNextKey')] = sp_next  # Native int
 
     print(f'[OK] Annotations: {fixed} fixed, {sp_next} tagged')
     return fixed
@@ -204,9 +378,8 @@ def _get_page_num(pdf, elem):
         kids = elem['/K']
         if not isinstance(kids, Array):
             kids = Array([kids])
-        for kid in kids:
+        for ko in kids:
             try:
-                ko = pdf.get_object(kid.objgen) if hasattr(kid, 'objgen') else kid
                 if isinstance(ko, Dictionary) and ko.get('/Type') == Name('/MCR') and '/Pg' in ko:
                     for i, page in enumerate(pdf.pages):
                         if page.obj.objgen == ko['/Pg'].objgen:
@@ -222,9 +395,8 @@ def _walk_tree(pdf, func, elem=None, depth=0):
         if '/StructTreeRoot' not in pdf.Root:
             return
         root = pdf.Root.StructTreeRoot
-        if hasattr(root, 'objgen'):
-            root = pdf.get_object(root.objgen)
-        _walk_tree(pdf, func, root, 0)
+        if isinstance(root, Dictionary):
+            _walk_tree(pdf, func, root, 0)
         return
     if not isinstance(elem, Dictionary):
         return
@@ -233,14 +405,10 @@ def _walk_tree(pdf, func, elem=None, depth=0):
         kids = elem['/K']
         if not isinstance(kids, Array):
             kids = Array([kids])
-        for kid in kids:
+        for kid in kids:  # pikepdf dereferences indirect kids on access
             try:
                 if isinstance(kid, Dictionary):
                     _walk_tree(pdf, func, kid, depth + 1)
-                elif hasattr(kid, 'objgen'):
-                    ko = pdf.get_object(kid.objgen)
-                    if isinstance(ko, Dictionary):
-                        _walk_tree(pdf, func, ko, depth + 1)
             except Exception:
                 pass
 
@@ -293,8 +461,7 @@ def patch_fix_bookmarks(pdf):
             Title=String(h['title']), Dest=dest, Parent=outline_root
         )))
 
-    for i, ref in enumerate(item_refs):
-        item = pdf.get_object(ref.objgen)
+    for i, item in enumerate(item_refs):
         if i > 0:
             item[Name('/Prev')] = item_refs[i - 1]
         if i < len(item_refs) - 1:
@@ -312,40 +479,34 @@ def patch_fix_figure_alt_text(pdf, use_ai=False, pdf_path=None, document_title=N
     restructured = [0]
     skipped_no_mcr = [0]
     ai_alts = {}
+    log_lines = []  # per-figure progress, written once after the walk
 
     if use_ai and pdf_path:
         try:
-            import anthropic, fitz
+            import fitz
             doc = fitz.open(pdf_path)
             images = []
             for pn, pg in enumerate(doc):
-                for img in pg.get_images(full=True):
+                for img in pg.get_images(full=False):
                     images.append({'page': pn + 1, 'index': len(images) + 1})
             doc.close()
-            if images:
-                api_key = os.getenv('ANTHROPIC_API_KEY')
-                if api_key:
-                    client = anthropic.Anthropic(api_key=api_key)
-                    msg = client.messages.create(
-                        model='claude-sonnet-4-6', max_tokens=1000,
-                        messages=[{'role': 'user', 'content':
-                            f'PDF "{document_title or "Document"}" has {len(images)} figures.\n'
-                            f'Images: {json.dumps(images)}\n'
-                            'Return JSON mapping figure number (1-based) to concise alt text under 125 chars.\n'
-                            'Example: {"1": "Decorative illustration", "2": "Bar chart"}\n'
-                            'JSON only, no markdown.'}]
-                    )
-                    text = msg.content[0].text.strip()
-                    if text.startswith('```'):
-                        text = text.split('```')[1]
-                        if text.startswith('json'):
-                            text = text[4:]
-                    ai_alts = json.loads(text.strip())
+            client = _claude_client() if images else None
+            if client is not None:
+                msg = client.messages.create(
+                    model='claude-sonnet-4-6', max_tokens=1000,
+                    messages=[{'role': 'user', 'content':
+                        f'PDF "{document_title or "Document"}" has {len(images)} figures.\n'
+                        f'Images: {_json_dumps(images)}\n'
+                        'Return JSON mapping figure number (1-based) to concise alt text under 125 chars.\n'
+                        'Example: {"1": "Decorative illustration", "2": "Bar chart"}\n'
+                        'JSON only, no markdown.'}]
+                )
+                ai_alts = _json_loads(_strip_code_fence(msg.content[0].text.strip()).strip())
         except Exception as e:
             print(f'  [WARN] AI alt text failed: {e}')
 
     def _get_struct_children(elem):
-        """Return list of (ref, obj) for structural children (not MCR/OBJR/int)."""
+        """Return the structural children (not MCR/OBJR/int)."""
         result = []
         if '/K' not in elem:
             return result
@@ -356,11 +517,10 @@ def patch_fix_figure_alt_text(pdf, use_ai=False, pdf_path=None, document_title=N
             if isinstance(kid, int):
                 continue
             try:
-                ko = pdf.get_object(kid.objgen) if hasattr(kid, 'objgen') else kid
-                if isinstance(ko, Dictionary):
-                    t = str(ko.get('/Type', '')).lstrip('/')
-                    if t not in ('MCR', 'OBJR'):
-                        result.append((kid, ko))
+                if isinstance(kid, Dictionary):
+                    t = str(kid.get('/Type', '')).lstrip('/')
+                    if t not in CONTENT_REF_TYPES:
+                        result.append(kid)
             except Exception:
                 pass
         return result
@@ -376,10 +536,9 @@ def patch_fix_figure_alt_text(pdf, use_ai=False, pdf_path=None, document_title=N
             if isinstance(kid, int):
                 return True
             try:
-                ko = pdf.get_object(kid.objgen) if hasattr(kid, 'objgen') else kid
-                if isinstance(ko, Dictionary):
-                    t = str(ko.get('/Type', '')).lstrip('/')
-                    if t in ('MCR', 'OBJR'):
+                if isinstance(kid, Dictionary):
+                    t = str(kid.get('/Type', '')).lstrip('/')
+                    if t in CONTENT_REF_TYPES:
                         return True
             except Exception:
                 pass
@@ -404,13 +563,16 @@ def patch_fix_figure_alt_text(pdf, use_ai=False, pdf_path=None, document_title=N
                 page_n = _get_page_num(pdf, elem)
                 alt_text = f'Figure {figure_count[0]} on page {page_n + 1}'
 
-            for kid_ref, child in struct_children:
+            for child in struct_children:
                 child_s = str(child.get('/S', '')).lstrip('/')
                 if child_s == 'Link':
                     try:
                         # Get the Link's current kids (MCR/content refs)
-                        link_kids = child.get('/K', Array([]))
-                        if not isinstance(link_kids, Array):
+                        # (an empty Array is only built when the Link really has no /K)
+                        link_kids = child.get('/K')
+                        if link_kids is None:
+                            link_kids = Array([])
+                        elif not isinstance(link_kids, Array):
                             link_kids = Array([link_kids])
 
                         # Create a new Figure element as a child of the Link
@@ -418,7 +580,7 @@ def patch_fix_figure_alt_text(pdf, use_ai=False, pdf_path=None, document_title=N
                         new_fig = pdf.make_indirect(Dictionary(
                             Type=Name('/StructElem'),
                             S=Name('/Figure'),
-                            P=kid_ref,
+                            P=child,
                             Alt=String(alt_text),
                             K=link_kids
                         ))
@@ -428,16 +590,15 @@ def patch_fix_figure_alt_text(pdf, use_ai=False, pdf_path=None, document_title=N
                             if isinstance(lk, int):
                                 continue
                             try:
-                                lko = pdf.get_object(lk.objgen) if hasattr(lk, 'objgen') else lk
-                                if isinstance(lko, Dictionary):
-                                    lko[Name('/P')] = new_fig
+                                if isinstance(lk, Dictionary):
+                                    lk[Name('/P')] = new_fig
                             except Exception:
                                 pass
 
                         # Link now wraps the new Figure
                         child[Name('/K')] = Array([new_fig])
-                        print(f'  [RESTRUCTURE] Figure {figure_count[0]}: '
-                              f'created Figure inside Link with alt="{alt_text[:50]}"')
+                        log_lines.append(f'  [RESTRUCTURE] Figure {figure_count[0]}: '
+                                         f'created Figure inside Link with alt="{alt_text[:50]}"')
                     except Exception as e:
                         print(f'  [WARN] Restructure failed for Figure {figure_count[0]}: {e}')
 
@@ -453,7 +614,7 @@ def patch_fix_figure_alt_text(pdf, use_ai=False, pdf_path=None, document_title=N
             skipped_no_mcr[0] += 1
             if '/Alt' in elem:
                 del elem[Name('/Alt')]
-                print(f'  [REMOVED] Figure {figure_count[0]}: /Alt removed (no content reference)')
+                log_lines.append(f'  [REMOVED] Figure {figure_count[0]}: /Alt removed (no content reference)')
             return
 
         # Case 3: Normal leaf figure — add /Alt if missing
@@ -465,9 +626,11 @@ def patch_fix_figure_alt_text(pdf, use_ai=False, pdf_path=None, document_title=N
             alt = f'Figure {figure_count[0]} on page {page + 1}'
         elem[Name('/Alt')] = String(alt)
         fixed[0] += 1
-        print(f'  [OK] Figure {figure_count[0]} alt text: {alt[:60]}')
+        log_lines.append(f'  [OK] Figure {figure_count[0]} alt text: {alt[:60]}')
 
     _walk_tree(pdf, fix_figure)
+    if log_lines:
+        sys.stdout.write('\n'.join(log_lines) + '\n')
     print(f'[OK] Figures: {figure_count[0]} found, {fixed[0]} alt texts added, '
           f'{restructured[0]} restructured (Figure moved inside Link), '
           f'{skipped_no_mcr[0]} skipped (no content)')
@@ -480,11 +643,9 @@ def _convert_row_to_th(pdf, tr_elem, cells_counter):
     row_kids = tr_elem['/K']
     if not isinstance(row_kids, Array):
         row_kids = Array([row_kids])
-    for ck in row_kids:
+    for cell in row_kids:
         try:
-            cell = ck if isinstance(ck, Dictionary) else (
-                pdf.get_object(ck.objgen) if hasattr(ck, 'objgen') else None)
-            if cell and isinstance(cell, Dictionary):
+            if isinstance(cell, Dictionary):
                 current = str(cell.get('/S', '')).lstrip('/')
                 if current != 'TH':
                     cell[Name('/S')] = Name('/TH')
@@ -509,27 +670,23 @@ def patch_fix_table_headers(pdf):
             kids = Array([kids])
 
         first_tr_done = False
-        for kid in kids:
+        for tr in kids:
             if first_tr_done:
                 break
             try:
-                tr = kid if isinstance(kid, Dictionary) else (
-                    pdf.get_object(kid.objgen) if hasattr(kid, 'objgen') else None)
-                if tr is None or not isinstance(tr, Dictionary):
+                if not isinstance(tr, Dictionary):
                     continue
                 tr_s = str(tr.get('/S', '')).lstrip('/')
 
                 # Descend into THead or TBody to find first TR
-                if tr_s in ('THead', 'TBody') and not first_tr_done:
+                if tr_s in TABLE_SECTION_TAGS and not first_tr_done:
                     if '/K' in tr:
                         wrapper_kids = tr['/K']
                         if not isinstance(wrapper_kids, Array):
                             wrapper_kids = Array([wrapper_kids])
-                        for wk in wrapper_kids:
+                        for inner in wrapper_kids:
                             try:
-                                inner = wk if isinstance(wk, Dictionary) else (
-                                    pdf.get_object(wk.objgen) if hasattr(wk, 'objgen') else None)
-                                if inner and str(inner.get('/S', '')).lstrip('/') == 'TR':
+                                if isinstance(inner, Dictionary) and str(inner.get('/S', '')).lstrip('/') == 'TR':
                                     _convert_row_to_th(pdf, inner, cells)
                                     first_tr_done = True
                                     break
@@ -554,21 +711,18 @@ def patch_fix_document_wrapper(pdf):
         print('[SKIP] Document wrapper: no StructTreeRoot')
         return
     sr = pdf.Root.StructTreeRoot
-    if hasattr(sr, 'objgen'):
-        sr = pdf.get_object(sr.objgen)
-    if '/K' not in sr:
+    if not isinstance(sr, Dictionary) or '/K' not in sr:
         print('[SKIP] Document wrapper: StructTreeRoot has no K')
         return
     kids = sr['/K']
     if not isinstance(kids, Array):
         kids = Array([kids])
     try:
-        first = kids[0]
-        elem = pdf.get_object(first.objgen) if hasattr(first, 'objgen') else first
+        elem = kids[0]
         if not isinstance(elem, Dictionary):
             return
         s = str(elem.get('/S', '')).lstrip('/')
-        if s in ('Document', 'document'):
+        if s in DOCUMENT_TAGS:
             print('[OK] Document wrapper: already /Document')
             return
         # Rename /Part (or whatever) -> /Document
@@ -583,44 +737,64 @@ def patch_fix_document_wrapper(pdf):
 # ===========================================================================
 
 class StructureTreeBuilder:
-    def __init__(self, pdf):
+    def __init__(self, pdf, simple_mcids=True):
         self.pdf = pdf
         self.mcid_counter = 0
         self.struct_elements = []
+        # Compact form: /Pg on the element + bare integer MCID in /K instead of an MCR dict
+        self.simple_mcids = simple_mcids
+        self._page_objs = {}  # page_num -> page dict, looked up once per page
 
     def create_root(self):
-        struct_root = Dictionary(Type=Name.StructTreeRoot, K=Array([]))
+        # Children are collected in self.struct_elements and written to Document /K once,
+        # in finalize(); nothing re-reads or re-writes the tree per element
+        # Pages get /StructParents, so the root always carries a ParentTree (ISO 32000-1
+        # 14.7.4.4), even when there are no annotations for fix_annotation_tagging to add
+        struct_root = Dictionary(Type=Name.StructTreeRoot,
+                                 ParentTree=self.pdf.make_indirect(Dictionary(Nums=Array([]))),
+                                 ParentTreeNextKey=0)  # Native int
         self.struct_root_ref = self.pdf.make_indirect(struct_root)
-        self.pdf.Root.StructTreeRoot = self.struct_root_ref
         self.doc_elem = Dictionary(Type=Name.StructElem, S=Name.Document,
                                    P=self.struct_root_ref, K=Array([]))
         self.doc_elem_ref = self.pdf.make_indirect(self.doc_elem)
         struct_root.K = Array([self.doc_elem_ref])
+        self.pdf.Root.StructTreeRoot = self.struct_root_ref
         print('[OK] Created StructTreeRoot -> Document hierarchy')
 
+    def _page_obj(self, page_num):
+        page_obj = self._page_objs.get(page_num)
+        if page_obj is None:
+            page_obj = self._page_objs[page_num] = self.pdf.pages[page_num].obj
+        return page_obj
+
+    def _mcid_entries(self, page_obj, mcid):
+        """Keys linking a new element to marked-content sequence mcid on page_obj."""
+        if self.simple_mcids:
+            return {'Pg': page_obj, 'K': Array([mcid])}  # Native int for MCID
+        mcr = Dictionary(Type=Name.MCR, Pg=page_obj, MCID=mcid)  # Native int for MCID
+        return {'K': Array([self.pdf.make_indirect(mcr)])}
+
     def create_element(self, tag, page_num, mcid=None, text=None, alt=None):
-        page = self.pdf.pages[page_num]
+        page_obj = self._page_obj(page_num)
+        if mcid is None:
+            mcid = self.mcid_counter
+            self.mcid_counter += 1
         elem = Dictionary(
             Type=Name.StructElem,
-            S=Name(tag) if tag.startswith('/') else Name(f'/{tag}'),
+            S=tag if isinstance(tag, Name) else Name(tag if tag.startswith('/') else f'/{tag}'),
             P=self.doc_elem_ref,
-            K=Array([])
+            **self._mcid_entries(page_obj, mcid)
         )
         if text:
             elem.T = String(text)
         if alt:
             elem.Alt = String(alt)
-        if mcid is None:
-            mcid = self.mcid_counter
-            self.mcid_counter += 1
-        mcr = Dictionary(Type=Name.MCR, Pg=page.obj, MCID=mcid)  # Native int for MCID
-        elem.K = Array([self.pdf.make_indirect(mcr)])
         elem_ref = self.pdf.make_indirect(elem)
         self.struct_elements.append(elem_ref)
         return elem_ref, mcid
 
     def create_table(self, page_num, table_data, mcid_start=None):
-        page = self.pdf.pages[page_num]
+        page_obj = self._page_obj(page_num)
         if mcid_start is None:
             mcid_start = self.mcid_counter
         table_elem = Dictionary(Type=Name.StructElem, S=Name.Table,
@@ -643,11 +817,9 @@ class StructureTreeBuilder:
             for cell_idx, cell in enumerate(cells):
                 cell_tag = Name.TH if (has_headers and row_idx == 0) else Name.TD
                 cell_elem = Dictionary(Type=Name.StructElem, S=cell_tag,
-                                       P=tr_ref, K=Array([]))
+                                       P=tr_ref, **self._mcid_entries(page_obj, mcid))
                 if has_headers and row_idx == 0:
                     cell_elem[Name('/Scope')] = Name('/Column')
-                mcr = Dictionary(Type=Name.MCR, Pg=page.obj, MCID=mcid)  # Native int
-                cell_elem.K = Array([self.pdf.make_indirect(mcr)])
                 cell_refs.append(self.pdf.make_indirect(cell_elem))
                 mcid += 1
             tr_elem.K = Array(cell_refs)
@@ -658,7 +830,7 @@ class StructureTreeBuilder:
         return table_ref, (mcid - mcid_start)
 
     def create_list(self, page_num, list_data, mcid_start=None):
-        page = self.pdf.pages[page_num]
+        page_obj = self._page_obj(page_num)
         if mcid_start is None:
             mcid_start = self.mcid_counter
         list_elem = Dictionary(Type=Name.StructElem, S=Name.L,
@@ -671,13 +843,11 @@ class StructureTreeBuilder:
             li_elem = Dictionary(Type=Name.StructElem, S=Name.LI,
                                  P=list_ref, K=Array([]))
             li_ref = self.pdf.make_indirect(li_elem)
-            lbl_elem = Dictionary(Type=Name.StructElem, S=Name.Lbl, P=li_ref, K=Array([]))
-            lbl_elem.K = Array([self.pdf.make_indirect(
-                Dictionary(Type=Name.MCR, Pg=page.obj, MCID=mcid))])  # Native int
+            lbl_elem = Dictionary(Type=Name.StructElem, S=Name.Lbl, P=li_ref,
+                                  **self._mcid_entries(page_obj, mcid))
             mcid += 1
-            lbody_elem = Dictionary(Type=Name.StructElem, S=Name.LBody, P=li_ref, K=Array([]))
-            lbody_elem.K = Array([self.pdf.make_indirect(
-                Dictionary(Type=Name.MCR, Pg=page.obj, MCID=mcid))])  # Native int
+            lbody_elem = Dictionary(Type=Name.StructElem, S=Name.LBody, P=li_ref,
+                                    **self._mcid_entries(page_obj, mcid))
             mcid += 1
             li_elem.K = Array([self.pdf.make_indirect(lbl_elem),
                                 self.pdf.make_indirect(lbody_elem)])
@@ -709,98 +879,201 @@ def add_mcid_to_page(pdf, page_num, mcid, tag='/P'):
         return False
 
 
-def get_image_alt_text_from_claude(pdf_path, document_title=None):
+def _request_image_alt_texts(client, document_title, images):
+    prompt = (f'PDF "{document_title or "Document"}" has {len(images)} images needing alt text.\n'
+              f'{_json_dumps(images)}\n'
+              'Return JSON with keys as each image\'s "index" value and values as alt text under 125 chars.\n'
+              'JSON only.')
+    msg = client.messages.create(model='claude-sonnet-4-6', max_tokens=1500,
+                                 messages=[{'role': 'user', 'content': prompt}])
+    return _json_loads(_strip_code_fence(msg.content[0].text).strip())
+
+
+def _request_batch_alt_texts(client, document_title, batch):
+    """Alt texts for one batch; if the batch request fails, its images are retried one at a
+    time so a bad image or reply loses only that image, not the whole batch."""
+    try:
+        alt_texts = _request_image_alt_texts(client, document_title, batch)
+        if isinstance(alt_texts, dict):
+            return alt_texts
+        print(f'  [WARN] AI alt text batch: unexpected reply, retrying {len(batch)} images one by one')
+    except Exception as e:
+        print(f'  [WARN] AI alt text batch: {e}; retrying {len(batch)} images one by one')
+    alt_texts = {}
+    for image in batch:
+        try:
+            result = _request_image_alt_texts(client, document_title, [image])
+            if isinstance(result, dict):
+                alt_texts.update(result)
+        except Exception as e:
+            print(f'  [WARN] AI alt text for image {image["index"]}: {e}')
+    return alt_texts
+
+
+def get_image_alt_text_from_claude(pdf_or_path, document_title=None, skip_pages=()):
+    """Map 1-based image index -> AI alt text; images on skip_pages (1-based) already have fixes.
+
+    Accepts an already-open Pdf (left open) or a path to open. Images with identical
+    stream bytes (repeated logos, headers) are sent once and share the returned alt text.
+    """
     try:
-        import anthropic
         images = []
-        with pikepdf.Pdf.open(pdf_path) as pdf:
+        image_index = 0
+        first_index_by_digest = {}
+        duplicates = []  # (image_index, index of first image with the same bytes)
+        if isinstance(pdf_or_path, pikepdf.Pdf):
+            pdf_ctx = contextlib.nullcontext(pdf_or_path)
+        else:
+            pdf_ctx = pikepdf.Pdf.open(pdf_or_path)
+        with pdf_ctx as pdf:
             for pn, page in enumerate(pdf.pages):
                 if '/Resources' not in page or '/XObject' not in page.Resources:
                     continue
                 for name, xobj in page.Resources.XObject.items():
                     try:
-                        if xobj.get('/Subtype') == Name('/Image'):
-                            images.append({'page': pn + 1, 'name': str(name),
+                        if xobj.get('/Subtype') == IMAGE_SUBTYPE:
+                            image_index += 1
+                            if pn + 1 in skip_pages:
+                                continue
+                            digest = hashlib.sha256(xobj.read_raw_bytes()).digest()
+                            first_index = first_index_by_digest.setdefault(digest, image_index)
+                            if first_index != image_index:
+                                duplicates.append((image_index, first_index))
+                                continue
+                            images.append({'index': image_index, 'page': pn + 1, 'name': str(name),
                                            'width': int(xobj.get('/Width', 0)),
                                            'height': int(xobj.get('/Height', 0))})
                     except Exception:
                         pass
         if not images:
             return {}
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
+        client = _claude_client()
+        if client is None:
             return {}
-        client = anthropic.Anthropic(api_key=api_key)
-        prompt = (f'PDF "{document_title or "Document"}" has {len(images)} images.\n'
-                  f'{json.dumps(images, indent=2)}\n'
-                  'Return JSON with keys as image index (1-based) and values as alt text under 125 chars.\n'
-                  'JSON only.')
-        msg = client.messages.create(model='claude-sonnet-4-6', max_tokens=1500,
-                                     messages=[{'role': 'user', 'content': prompt}])
-        text = msg.content[0].text
-        if '```' in text:
-            text = text.split('```')[1]
-            if text.startswith('json'):
-                text = text[4:]
-        return json.loads(text.strip())
+        if len(images) <= ALT_TEXT_BATCH_THRESHOLD:
+            alt_texts = _request_image_alt_texts(client, document_title, images)
+        else:
+            batches = [images[i:i + ALT_TEXT_BATCH_SIZE] for i in range(0, len(images), ALT_TEXT_BATCH_SIZE)]
+            alt_texts = {}
+            with ThreadPoolExecutor(max_workers=ALT_TEXT_BATCH_WORKERS) as executor:
+                for batch_result in executor.map(
+                        lambda batch: _request_batch_alt_texts(client, document_title, batch), batches):
+                    alt_texts.update(batch_result)
+        for image_index, first_index in duplicates:
+            if str(first_index) in alt_texts:
+                alt_texts[str(image_index)] = alt_texts[str(first_index)]
+        return alt_texts
     except Exception as e:
         print(f'[WARN] AI alt text: {e}')
         return {}
 
 
+def _iter_fixes(path):
+    """Yield fixes from a JSON list or {"fixes": [...]} file; streamed when ijson is installed."""
+    with open(path, 'rb') as f:
+        if ijson is None:
+            data = _json_loads(f.read())
+            yield from (data if isinstance(data, list) else data.get('fixes', []))
+            return
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        yield from ijson.items(f, 'item' if first == b'[' else 'fixes.item', use_float=True)
+
+
+def _fix_key(fix):
+    """The whole fix as canonical JSON: only exact duplicates share a key (fixes that differ
+    in any field, e.g. imageIndex or readingOrder, are distinct elements)."""
+    return json.dumps(fix, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def _load_fixes_by_page(path):
+    """Stream fixes into {page index: [fix, ...]}, dropping exact duplicates.
+
+    Page order is kept since it is the reading order. Returns (fixes_by_page, loaded, skipped).
+    """
+    fixes_by_page = {}
+    loaded = 0
+    seen = set()
+    for fix in _iter_fixes(path):
+        loaded += 1
+        key = _fix_key(fix)
+        if key in seen:
+            continue
+        seen.add(key)
+        fixes_by_page.setdefault(fix.get('page', 1) - 1, []).append(fix)
+    return fixes_by_page, loaded, loaded - len(seen)
+
+
+def _tag_heading_fix(builder, page_num, fix, log_lines):
+    fix_text = fix.get('text', '')
+    # ijson parses numbers as floats (use_float=True), so level may be 2.0
+    fix_level = int(fix.get('level', 1))
+    tag = HEADING_TAGS[min(max(fix_level, 1), 6) - 1]
+    ref, mcid = builder.create_element(tag, page_num, text=fix_text or f'Heading {fix_level}')
+    log_lines.append(f'  [OK] {tag}: {fix_text[:50]}')
+    return ref, mcid
+
+
+def _tag_table_fix(builder, page_num, fix, log_lines):
+    ref, _ = builder.create_table(page_num, fix.get('tableData', {}))
+    return ref, None
+
+
+def _tag_list_fix(builder, page_num, fix, log_lines):
+    ref, _ = builder.create_list(page_num, fix.get('listData', {}))
+    return ref, None
+
+
+def _tag_image_fix(builder, page_num, fix, log_lines):
+    alt = fix.get('altText', fix.get('extractedText', f'Image on page {page_num + 1}'))
+    return builder.create_element(FIGURE_TAG, page_num, alt=alt)
+
+
+# Fix type -> handler returning the (ref, mcid) of the element it created;
+# unknown types are ignored
+_PAGE_FIX_HANDLERS = {
+    'heading': _tag_heading_fix,
+    'table': _tag_table_fix,
+    'list': _tag_list_fix,
+    'altText': _tag_image_fix,
+    'imageOfText': _tag_image_fix,
+}
+
+
 def tag_page_content(pdf, builder, page_num, fixes_for_page=None,
                      image_alt_texts=None, image_counter=None):
     page = pdf.pages[page_num]
     page.StructParents = page_num
     elements_created = []
+    log_lines = []  # per-element progress, written once per page
 
     if fixes_for_page:
         for fix in fixes_for_page:
-            fix_type = fix.get('type')
-            fix_text = fix.get('text', '')
-            fix_level = fix.get('level', 1)
-
-            if fix_type == 'heading':
-                tag = f'/H{min(max(fix_level, 1), 6)}'
-                ref, mcid = builder.create_element(tag, page_num, text=fix_text or f'Heading {fix_level}')
-                elements_created.append((ref, mcid))
-                print(f'  [OK] {tag}: {fix_text[:50]}')
-
-            elif fix_type == 'table':
-                table_data = fix.get('tableData', {})
-                ref, _ = builder.create_table(page_num, table_data)
-                elements_created.append((ref, None))
-
-            elif fix_type == 'list':
-                list_data = fix.get('listData', {})
-                ref, _ = builder.create_list(page_num, list_data)
-                elements_created.append((ref, None))
-
-            elif fix_type in ('altText', 'imageOfText'):
-                alt = fix.get('altText', fix.get('extractedText', f'Image on page {page_num + 1}'))
-                ref, mcid = builder.create_element('/Figure', page_num, alt=alt)
-                elements_created.append((ref, mcid))
-
-    # Auto-tag images not already handled
+            handler = _PAGE_FIX_HANDLERS.get(fix.get('type'))
+            if handler is not None:
+                elements_created.append(handler(builder, page_num, fix, log_lines))
+
+    # Auto-tag images not already handled; image fixes cover the whole page, so decide once
     if '/Resources' in page and '/XObject' in page.Resources:
         image_count = 0
+        already = fixes_for_page and any(
+            f.get('type') in IMAGE_FIX_TYPES for f in fixes_for_page)
+        alt_texts = image_alt_texts or {}
+        if image_counter is None:
+            image_counter = [0]  # no document-wide count: number images per page
         for name, xobj in page.Resources.XObject.items():
             try:
-                if xobj.get('/Subtype') == Name('/Image'):
+                if xobj.get('/Subtype') == IMAGE_SUBTYPE:
                     image_count += 1
-                    if image_counter is not None:
-                        image_counter[0] += 1
-                        idx = image_counter[0]
-                    else:
-                        idx = image_count
-                    already = fixes_for_page and any(
-                        f.get('type') in ('altText', 'imageOfText') for f in fixes_for_page)
+                    image_counter[0] += 1
                     if not already:
-                        alt = (image_alt_texts or {}).get(str(idx),
-                                                          f'Image {image_count} on page {page_num + 1}')
-                        ref, mcid = builder.create_element('/Figure', page_num, alt=alt)
+                        alt = alt_texts.get(str(image_counter[0]),
+                                            f'Image {image_count} on page {page_num + 1}')
+                        ref, mcid = builder.create_element(FIGURE_TAG, page_num, alt=alt)
                         elements_created.append((ref, mcid))
-                        print(f'  [OK] Figure on page {page_num + 1}: {alt[:50]}')
+                        log_lines.append(f'  [OK] Figure on page {page_num + 1}: {alt[:50]}')
             except Exception:
                 pass
 
@@ -814,16 +1087,20 @@ def tag_page_content(pdf, builder, page_num, fixes_for_page=None,
             add_mcid_to_page(pdf, page_num, mcid, tag='/P')
             break
 
+    if log_lines:
+        sys.stdout.write('\n'.join(log_lines) + '\n')
     return len(elements_created)
 
 
 def audit_color_contrast(pdf_path):
+    """Yield low-contrast text spans (against white) from the first 50 pages."""
     try:
         import fitz
         doc = fitz.open(pdf_path)
-        issues = []
+        # Text spans only: image blocks (and their pixel data) are never looked at
+        flags = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
         for pn in range(min(len(doc), 50)):
-            for block in doc[pn].get_text('dict')['blocks']:
+            for block in doc[pn].get_text('dict', flags=flags)['blocks']:
                 if 'lines' not in block:
                     continue
                 for line in block['lines']:
@@ -844,16 +1121,14 @@ def audit_color_contrast(pdf_path):
                                    (min(lum(r, g, b), lum(255, 255, 255)) + 0.05)
                         req = 3.0 if span.get('size', 12) >= 18 else 4.5
                         if contrast < req:
-                            issues.append({
+                            yield {
                                 'page': pn + 1, 'contrast_ratio': round(contrast, 2),
                                 'required_ratio': req, 'text_sample': text,
                                 'text_color': f'rgb({r},{g},{b})'
-                            })
+                            }
         doc.close()
-        return issues
     except Exception as e:
         print(f'[WARN] Contrast audit: {e}')
-        return []
 
 
 def audit_reading_order(pdf_path):
@@ -882,6 +1157,25 @@ def audit_reading_order(pdf_path):
         return []
 
 
+def write_audit(path, sections):
+    """Stream {section: {"issues": [...]}} to path one issue at a time (same layout as
+    json.dump(indent=2)); returns {section: issue_count}."""
+    counts = {}
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{')
+        for section_num, (section, issues) in enumerate(sections.items()):
+            f.write(f'{"," if section_num else ""}\n  {json.dumps(section)}: {{\n    "issues": [')
+            count = 0
+            for issue in issues:
+                f.write(f'{"," if count else ""}\n      ')
+                f.write(json.dumps(issue, indent=2).replace('\n', '\n      '))
+                count += 1
+            f.write('\n    ]\n  }' if count else ']\n  }')
+            counts[section] = count
+        f.write('\n}')
+    return counts
+
+
 # ===========================================================================
 # MAIN
 # ===========================================================================
@@ -898,6 +1192,8 @@ def main():
     parser.add_argument('--audit', action='store_true')
     parser.add_argument('--force-rebuild', action='store_true',
                         help='Force rebuild mode even if structure tree exists')
+    parser.add_argument('--deep-clean', action='store_true',
+                        help='Decode and recompress every stream on save (slower, smaller output)')
     args = parser.parse_args()
 
     input_path = Path(args.input)
@@ -913,8 +1209,7 @@ def main():
         print('[INFO] Detecting language...')
         lang_code = detect_language_with_ai(str(input_path), title)
         print(f'[INFO] Language: {lang_code}')
-    base = lang_code.split('-')[0].split('_')[0]
-    lang_name = LANG_NAME_MAP.get(lang_code) or LANG_NAME_MAP.get(base, 'English')
+    lang_name = _lang_name_for(lang_code)
 
     print(f'\n[INFO] Input:  {input_path}')
     print(f'[INFO] Output: {output_path}')
@@ -934,6 +1229,10 @@ def main():
         # Always set metadata
         set_metadata(pdf, title, lang_code, lang_name)
 
+        # Resolve annotations once; neither mode adds or removes them before tagging
+        pages_with_annots = _pages_with_annots(pdf)
+        annotations = _collect_annotations(pdf, pages_with_annots)
+
         # ---------------------------------------------------------------
         if has_structure:
             print('\n[PATCH] Fixing document wrapper...')
@@ -954,33 +1253,32 @@ def main():
             patch_fix_table_headers(pdf)
 
             print('\n[PATCH] Tagging annotations...')
-            fix_annotation_tagging(pdf)
+            fix_annotation_tagging(pdf, annotations)
 
         # ---------------------------------------------------------------
         else:
-            # Load fixes JSON
-            fixes = []
+            # Stream fixes, grouping by page as they arrive and dropping exact repeats
+            fixes_by_page = {}
             if args.fixes:
                 try:
-                    with open(args.fixes, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    fixes = data if isinstance(data, list) else data.get('fixes', [])
-                    print(f'[INFO] Loaded {len(fixes)} fixes')
+                    fixes_by_page, loaded, skipped = _load_fixes_by_page(args.fixes)
+                    print(f'[INFO] Loaded {loaded} fixes')
+                    if skipped:
+                        print(f'[INFO] Skipped {skipped} duplicate fixes')
                 except Exception as e:
+                    fixes_by_page = {}
                     print(f'[WARN] Could not load fixes: {e}')
 
-            fixes_by_page = {}
-            for fix in fixes:
-                p = fix.get('page', 1) - 1
-                fixes_by_page.setdefault(p, []).append(fix)
-
             builder = StructureTreeBuilder(pdf)
             builder.create_root()
 
             image_alt_texts = {}
             if args.use_ai:
                 print('\n[INFO] Getting AI alt text for images...')
-                image_alt_texts = get_image_alt_text_from_claude(str(input_path), title)
+                # Pages with altText/imageOfText fixes never use AI alt text
+                skip_pages = {pn + 1 for pn, page_fixes in fixes_by_page.items()
+                              if any(f.get('type') in IMAGE_FIX_TYPES for f in page_fixes)}
+                image_alt_texts = get_image_alt_text_from_claude(pdf, title, skip_pages)
 
             image_counter = [0]
             total = 0
@@ -991,7 +1289,7 @@ def main():
             builder.finalize()
 
             print('\n[REBUILD] Tagging annotations...')
-            fix_annotation_tagging(pdf)
+            fix_annotation_tagging(pdf, annotations)
 
             # Empty outlines (rebuild mode has no heading text to extract)
             pdf.Root.Outlines = pdf.make_indirect(Dictionary(
@@ -1000,21 +1298,27 @@ def main():
 
         # ---------------------------------------------------------------
         print(f'\n[INFO] Saving: {output_path}')
-        pdf.save(str(output_path))
+        # Pack objects into object streams; untouched streams are copied without re-decoding
+        # unless a deep clean was requested
+        pdf.save(str(output_path),
+                 object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                 compress_streams=True,
+                 stream_decode_level=(pikepdf.StreamDecodeLevel.generalized if args.deep_clean
+                                      else pikepdf.StreamDecodeLevel.none),
+                 recompress_flate=args.deep_clean,
+                 fix_metadata_version=True)
         print(f'[OK] Done — {len(pdf.pages)} pages')
 
     if args.audit:
         print('\n[INFO] Running audits...')
-        results = {
-            'color_contrast': {'issues': audit_color_contrast(str(output_path))},
-            'reading_order': {'issues': audit_reading_order(str(output_path))}
-        }
         audit_out = output_path.parent / f'{output_path.stem}_audit.json'
-        with open(audit_out, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2)
+        counts = write_audit(audit_out, {
+            'color_contrast': audit_color_contrast(str(output_path)),
+            'reading_order': audit_reading_order(str(output_path))
+        })
         print(f'[OK] Audit saved: {audit_out}')
-        print(f'  Contrast issues: {len(results["color_contrast"]["issues"])}')
-        print(f'  Reading order issues: {len(results["reading_order"]["issues"])}')
+        print(f'  Contrast issues: {counts["color_contrast"]}')
+        print(f'  Reading order issues: {counts["reading_order"]}')
 
 
 if __name__ == '__main__':
@@ -3,6 +3,8 @@ import pikepdf
 import json
 import sys
 
+NAME_DOCUMENT = pikepdf.Name('/Document')
+
 pdf_path = sys.argv[1] if len(sys.argv) > 1 else "Introduction-to-Research_tagged-test.pdf"
 
 with pikepdf.Pdf.open(pdf_path) as pdf:
@@ -13,31 +15,20 @@ with pikepdf.Pdf.open(pdf_path) as pdf:
         'has_title': False
     }
     
+    # pikepdf dereferences indirect objects on access, so no get_object() round-trips
     if '/Info' in pdf.Root:
         info = pdf.Root['/Info']
-        if hasattr(info, 'objgen'):
-            info_obj = pdf.get_object(info.objgen)
-        else:
-            info_obj = info
-        result['has_title'] = '/Title' in info_obj if hasattr(info_obj, 'get') else False
+        result['has_title'] = '/Title' in info if isinstance(info, pikepdf.Dictionary) else False
     
     if result['has_struct_root']:
-        sr = pdf.Root['/StructTreeRoot']
-        if hasattr(sr, 'objgen'):
-            sro = pdf.get_object(sr.objgen)
-        else:
-            sro = sr
+        sro = pdf.Root['/StructTreeRoot']
         k = sro.get('/K', [])
         result['k_count'] = len(k) if k else 0
         result['first_is_doc'] = False
         if k and len(k) > 0:
-            fc = k[0]
-            if hasattr(fc, 'objgen'):
-                fco = pdf.get_object(fc.objgen)
-            else:
-                fco = fc
-            if hasattr(fco, 'get'):
-                result['first_is_doc'] = fco.get('/S') == pikepdf.Name('/Document')
+            fco = k[0]
+            if isinstance(fco, pikepdf.Dictionary):
+                result['first_is_doc'] = fco.get('/S') == NAME_DOCUMENT
     
     print(json.dumps(result, indent=2))
 
@@ -4,19 +4,200 @@ Rigorous PDF/UA ISO 14289-1 Validator
 Validates compliance with ISO 14289-1 (PDF/UA) standard - 100% compliance required
 """
 
+import io
+import os
+import re
 import sys
 import pikepdf
 import fitz  # PyMuPDF
 from typing import Dict, List, Tuple, Any
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 import json
 
+try:
+    import orjson  # optional: faster serialization of large result sets
+except ImportError:
+    orjson = None
+
+# Text-showing operators, counted as literal bytes in each page's content stream
+TEXT_OPERATORS = (b'Tj', b'TJ', b"'", b'"')
+
+
+# PDF names compared in the checks, built once instead of per comparison
+NAME_STRUCT_TREE_ROOT = pikepdf.Name('/StructTreeRoot')
+NAME_DOCUMENT = pikepdf.Name('/Document')
+NAME_WIDGET = pikepdf.Name('/Widget')
+NAME_TRUE = pikepdf.Name('/true')
+NAME_MCR = pikepdf.Name('/MCR')
+
+# Heading structure types -> level; /H is the untyped heading (treated as level 1)
+HEADING_LEVELS = {'/H': 1, **{f'/H{level}': level for level in range(1, 7)}}
+
+# Indirect references ("12 0 R") inside a /Contents value
+CONTENTS_REF_RE = re.compile(r'(\d+)\s+\d+\s+R')
+
+# Per-figure / per-field failures kept for one check; the counts in details stay exact
+MAX_FAILURES_PER_CHECK = 50
+
+# Below this many pages check 4 scans in-process even when workers are requested
+PARALLEL_MIN_PAGES = 50
+
+
+def _content_xrefs(doc, page_num: int) -> List[int]:
+    """Content stream xrefs of a page, read from its dictionary without building a fitz.Page"""
+    kind, value = doc.xref_get_key(doc.page_xref(page_num), 'Contents')
+    if kind == 'xref':
+        xref = int(value.split()[0])
+        if doc.xref_is_stream(xref):
+            return [xref]
+        value = doc.xref_object(xref)  # indirect array of streams
+    elif kind != 'array':
+        return []
+    return [int(ref) for ref in CONTENTS_REF_RE.findall(value)]
+
+
+def _kids(elem):
+    """/K of a structure node as an indexable sequence (a lone kid may be stored bare)"""
+    k = elem.get('/K')
+    if k is None:
+        return ()
+    return k if isinstance(k, pikepdf.Array) else (k,)
+
+
+def _scan_pages(doc, page_numbers) -> Tuple[int, int]:
+    """Count (text operators, text operators on pages with BDC/EMC) over the given pages"""
+    total_text_operators = 0
+    tagged_text_operators = 0
+    for page_num in page_numbers:
+        # Read the page's content streams one at a time rather than concatenated,
+        # so only a single decoded stream is held in memory
+        text_ops = 0
+        has_bdc = has_emc = False
+        for xref in _content_xrefs(doc, page_num):
+            content = doc.xref_stream(xref) or b''
+            
+            # Count text operators (Tj, TJ, ', ") - plain literal counts, no regex
+            text_ops += sum(map(content.count, TEXT_OPERATORS))
+            has_bdc = has_bdc or b'BDC' in content
+            has_emc = has_emc or b'EMC' in content
+        total_text_operators += text_ops
+        
+        # Rough estimate: if we have BDC/EMC pairs, assume content is tagged
+        # More accurate would be to parse the content stream properly
+        if text_ops and has_bdc and has_emc:
+            tagged_text_operators += text_ops  # Assume all are tagged if BDC/EMC present
+    return total_text_operators, tagged_text_operators
+
+
+def _classify_tagged_content(total: int, tagged: int, mcid_count: int) -> Tuple[bool, Any, List[str], List[str]]:
+    """Check 4 verdict from the operator counts: (passed, coverage percent or None, failures, warnings)
+
+    Structure-tree MCIDs are the primary signal; the BDC/EMC operator count is a
+    heuristic that only decides when the tree has too few MCIDs to vouch for the text.
+    """
+    if total == 0:
+        # No text operators: image-only, or tagged in a way the scan can't see
+        if mcid_count > 0:
+            return True, None, [], ["No text operators found but structure elements exist - document may be image-only or fully tagged"]
+        return False, None, [], ["No text operators found - document may be image-only"]
+    
+    mcids_cover_text = mcid_count > 0 and mcid_count >= total * 0.5
+    untagged_operators = not mcids_cover_text and tagged < total
+    coverage = tagged / total * 100 if untagged_operators else 100.0
+    
+    failures = []
+    if untagged_operators:
+        failures.append(f"Not all content is tagged: {coverage:.1f}% coverage (need 100%)")
+    if mcid_count == 0:
+        failures.append("No structure elements have MCID references")
+    
+    warnings = []
+    if failures and mcid_count > 100:  # Large number of structure elements indicates content is tagged
+        warnings.append(f"Structure tree has {mcid_count} elements with MCID - content is likely tagged (validator heuristic may be inaccurate)")
+    return not failures, coverage, failures, warnings
+
+
+def _scan_page_range(pdf_path: str, start: int, stop: int) -> Tuple[int, int]:
+    """Worker-process entry point: open the PDF separately and scan pages [start, stop)"""
+    doc = fitz.open(pdf_path)
+    try:
+        return _scan_pages(doc, range(start, stop))
+    finally:
+        doc.close()
+
+
+@dataclass
+class CheckResult:
+    """Outcome of one check; validate() turns these into the results['checks'] dicts"""
+    name: str
+    passed: bool = False
+    details: Dict[str, Any] = field(default_factory=dict)
+    failures: List[str] = field(default_factory=list)
+    
+    def add_failure(self, message: str):
+        """Append a failure unless the check already holds MAX_FAILURES_PER_CHECK of them"""
+        if len(self.failures) < MAX_FAILURES_PER_CHECK:
+            self.failures.append(message)
+        else:
+            self.details['failures_truncated'] = True
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {'passed': self.passed, 'details': self.details, 'failures': self.failures}
+
+
+@dataclass
+class StructTreeStats:
+    """Everything checks 4, 6, 7 and 8 need from one pass over the structure tree"""
+    mcid_count: int = 0
+    figures: List[Dict] = field(default_factory=list)
+    headings: List[int] = field(default_factory=list)  # heading levels, in structure order
+    cycles: List[str] = field(default_factory=list)
+    visited: set = field(default_factory=set)
+
+
 class RigorousPDFUAValidator:
     """Rigorous PDF/UA validator for ISO 14289-1 compliance"""
     
-    def __init__(self, pdf_path: str):
+    # (check name, method, needs a structure tree) in report order
+    CHECKS = (
+        ("Tagged PDF", 'check_1_tagged_pdf', False),
+        ("Primary Language", 'check_2_primary_language', False),
+        ("Title", 'check_3_title', False),
+        ("Tagged Content", 'check_4_tagged_content', True),
+        ("Tab Order", 'check_5_tab_order', True),
+        # Only the figure half needs the tree; form-field labels live on the pages
+        ("Other Elements Alternate Text", 'check_6_other_elements_alt_text', False),
+        ("Appropriate Nesting", 'check_7_heading_nesting', True),
+        ("Structure Tree Integrity", 'check_8_structure_tree_integrity', True),
+        ("MarkInfo/Marked", 'check_9_markinfo_marked', False),
+        ("Document Wrapper", 'check_10_document_wrapper', True),
+    )
+    
+    # Checks that need PyMuPDF (page content streams); skipped in quick mode
+    PYMUPDF_CHECKS = frozenset({'check_4_tagged_content'})
+    
+    def __init__(self, pdf_path: str, workers: int = 1):
         self.pdf_path = pdf_path
+        # Worker processes for the per-page content scan in check 4 (1 = in-process, 0 = one per CPU)
+        self.workers = workers or os.cpu_count() or 1
         self.pdf = None
-        self.doc = None
+        self._doc = None
+        # File contents, read once per validate() and shared by pikepdf and PyMuPDF
+        self._pdf_bytes = None
+        # Catalog entries and resolved StructTreeRoot, filled once per validate() call
+        self._root_dict = None
+        self._struct_root = None
+        self._struct_root_resolved = False
+        self._struct_root_kids = None
+        self._wrapper_kids = None
+        self._wrapper_kids_resolved = False
+        self._struct_stats = None
+        # Why the structure-tree checks are skipped (None = they run)
+        self._skip_reason = None
+        # One CheckResult per check, in run order
+        self._checks: List[CheckResult] = []
         self.results = {
             'pdf_path': pdf_path,
             'compliant': False,
@@ -26,33 +207,52 @@ class RigorousPDFUAValidator:
             'passed': []
         }
     
-    def validate(self) -> Dict[str, Any]:
-        """Run all validation checks"""
+    def validate(self, early_exit: bool = False, quick: bool = False,
+                 fail_fast: bool = False) -> Dict[str, Any]:
+        """Run all validation checks
+        
+        Without a StructTreeRoot the structure-tree checks (4, 5, 7, 8, 10) are
+        recorded as skipped instead of run, and check 6 only checks form-field
+        labels; with early_exit, any failure of the Tagged PDF check skips them too. quick skips the PyMuPDF checks (4) so only
+        pikepdf parses the file; they are recorded as skipped, so a quick run is
+        never reported compliant.
+        With fail_fast, every check after the first failing one is recorded as
+        skipped - enough for a pass/fail verdict.
+        """
         try:
-            # Open PDF with pikepdf
-            self.pdf = pikepdf.Pdf.open(self.pdf_path)
+            # Read the file once; pikepdf now and PyMuPDF (if needed) parse the same buffer
+            self._pdf_bytes = Path(self.pdf_path).read_bytes()
+            self.pdf = pikepdf.Pdf.open(io.BytesIO(self._pdf_bytes))
             
-            # Open PDF with PyMuPDF for content analysis
-            self.doc = fitz.open(self.pdf_path)
+            # Snapshot the catalog so key probes are plain dict lookups
+            self._root_dict = dict(self.pdf.Root)
             
             # Run all checks
-            self.check_1_tagged_pdf()
-            self.check_2_primary_language()
-            self.check_3_title()
-            self.check_4_tagged_content()
-            self.check_5_tab_order()
-            self.check_6_other_elements_alt_text()
-            self.check_7_heading_nesting()
-            self.check_8_structure_tree_integrity()
-            self.check_9_markinfo_marked()
-            self.check_10_document_wrapper()
+            self._skip_reason = None
+            fail_reason = None
+            for check_name, method_name, needs_struct_tree in self.CHECKS:
+                if quick and method_name in self.PYMUPDF_CHECKS:
+                    self._record_skipped(check_name, "quick mode")
+                    continue
+                if fail_reason or (needs_struct_tree and self._skip_reason):
+                    self._record_skipped(check_name, fail_reason or self._skip_reason)
+                    continue
+                getattr(self, method_name)()
+                
+                if fail_fast and not self._checks[-1].passed:
+                    # The verdict is already non-compliant; nothing below can change it
+                    fail_reason = f"fail-fast after {check_name}"
+                    continue
+                
+                if method_name == 'check_1_tagged_pdf':
+                    # Nothing below can pass without a structure tree to inspect
+                    if self.struct_root is None:
+                        self._skip_reason = "StructTreeRoot missing"
+                    elif early_exit and not self._checks[-1].passed:
+                        self._skip_reason = "document is not tagged"
             
             # Determine overall compliance
-            all_passed = all(
-                check.get('passed', False) 
-                for check in self.results['checks'].values()
-            )
-            self.results['compliant'] = all_passed
+            self.results['compliant'] = all(check.passed for check in self._checks)
             
             return self.results
             
@@ -61,728 +261,690 @@ class RigorousPDFUAValidator:
             self.results['compliant'] = False
             return self.results
         finally:
+            self.results['checks'] = {check.name: check.as_dict() for check in self._checks}
+            # Drop cached pikepdf objects before the file closes under them
+            self._root_dict = None
+            self._struct_root = None
+            self._struct_root_resolved = False
+            self._struct_root_kids = None
+            self._wrapper_kids = None
+            self._wrapper_kids_resolved = False
+            self._struct_stats = None
             if self.pdf:
                 self.pdf.close()
-            if self.doc:
-                self.doc.close()
+            if self._doc is not None:
+                self._doc.close()
+                self._doc = None
+            self._pdf_bytes = None
+    
+    @property
+    def doc(self):
+        """PyMuPDF document, opened on first use (only the content check, 4, needs it)"""
+        if self._doc is None:
+            if self._pdf_bytes is not None:
+                self._doc = fitz.open(stream=self._pdf_bytes, filetype='pdf')
+            else:
+                self._doc = fitz.open(self.pdf_path)
+        return self._doc
+    
+    def to_json(self) -> bytes:
+        """Serialize the results as indented UTF-8 JSON (orjson when installed, else json)"""
+        json_results = {
+            'pdf_path': self.results['pdf_path'],
+            'compliant': self.results['compliant'],
+            'checks': {},
+            'failures': self.results['failures'],
+            'warnings': self.results.get('warnings', []),
+            'passed': self.results['passed']
+        }
+        
+        for check_name, check_result in self.results['checks'].items():
+            json_results['checks'][check_name] = {
+                'passed': check_result['passed'],
+                'failures': check_result.get('failures', []),
+                'details': check_result.get('details', {})
+            }
+        
+        # Details are plain values; anything else (e.g. a stray pikepdf object) is
+        # stringified by the encoder only when it is actually met
+        if orjson is not None:
+            return orjson.dumps(json_results, option=orjson.OPT_INDENT_2, default=str)
+        return json.dumps(json_results, indent=2, default=str).encode('utf-8')
+    
+    @property
+    def struct_root(self):
+        """StructTreeRoot, resolved once and reused across checks (None if missing)"""
+        if not self._struct_root_resolved:
+            # pikepdf resolves indirect references on access, direct objects included
+            self._struct_root = self._root_dict.get('/StructTreeRoot')
+            self._struct_root_resolved = True
+        return self._struct_root
+    
+    @property
+    def struct_root_kids(self):
+        """StructTreeRoot /K as a sequence, cached alongside the root (checks 1, 5 and 10 read it)"""
+        if self._struct_root_kids is None:
+            root = self.struct_root
+            self._struct_root_kids = _kids(root) if root is not None else ()
+        return self._struct_root_kids
+    
+    @property
+    def wrapper_kids(self):
+        """/K of the StructTreeRoot's first child as a sequence, cached for checks 1, 5 and 10
+        (None if there is no first child or it is not a dictionary)"""
+        if not self._wrapper_kids_resolved:
+            k_array = self.struct_root_kids
+            if k_array and isinstance(k_array[0], pikepdf.Dictionary):
+                self._wrapper_kids = _kids(k_array[0])
+            self._wrapper_kids_resolved = True
+        return self._wrapper_kids
+    
+    def _record_skipped(self, check_name: str, reason: str):
+        """Record a structure check that validate() did not run"""
+        self._checks.append(CheckResult(check_name, details={'skipped': True},
+                                        failures=[f"Skipped: {reason}"]))
+        self.results['failures'].append(f"{check_name}: skipped ({reason})")
     
     def check_1_tagged_pdf(self):
         """Check 1: Document is tagged PDF (StructTreeRoot exists and is properly formed)"""
         check_name = "Tagged PDF"
-        check_result = {'passed': False, 'details': {}, 'failures': []}
+        check_result = CheckResult(check_name)
         
         try:
-            # Check StructTreeRoot exists
-            has_struct_root = '/StructTreeRoot' in self.pdf.Root
-            check_result['details']['structTreeRoot_exists'] = has_struct_root
+            # Check StructTreeRoot exists (resolved here once; the later checks reuse it)
+            struct_root_obj = self.struct_root
+            has_struct_root = struct_root_obj is not None
+            check_result.details['structTreeRoot_exists'] = has_struct_root
             
             if not has_struct_root:
-                check_result['failures'].append("StructTreeRoot missing from PDF root")
-                self.results['checks'][check_name] = check_result
+                check_result.failures.append("StructTreeRoot missing from PDF root")
+                self._checks.append(check_result)
                 self.results['failures'].append(f"{check_name}: StructTreeRoot missing")
                 return
             
-            # Get StructTreeRoot object
-            struct_root_ref = self.pdf.Root['/StructTreeRoot']
-            if hasattr(struct_root_ref, 'objgen'):
-                struct_root_obj = self.pdf.get_object(struct_root_ref.objgen)
-            else:
-                struct_root_obj = struct_root_ref
-            
             # Check StructTreeRoot has proper Type
             root_type = struct_root_obj.get('/Type')
-            if root_type != pikepdf.Name('/StructTreeRoot'):
-                check_result['failures'].append(f"StructTreeRoot has wrong Type: {root_type}")
+            if root_type != NAME_STRUCT_TREE_ROOT:
+                check_result.failures.append(f"StructTreeRoot has wrong Type: {root_type}")
             
             # Check StructTreeRoot has K array
-            k_array = struct_root_obj.get('/K', pikepdf.Array([]))
-            check_result['details']['k_array_length'] = len(k_array) if k_array else 0
+            k_array = self.struct_root_kids
+            check_result.details['k_array_length'] = len(k_array)
             
-            if not k_array or len(k_array) == 0:
-                check_result['failures'].append("StructTreeRoot K array is empty or missing")
+            if not k_array:
+                check_result.failures.append("StructTreeRoot K array is empty or missing")
             
             # Check Document wrapper exists as first child
             if len(k_array) > 0:
-                first_child = k_array[0]
-                if hasattr(first_child, 'objgen'):
-                    first_child_obj = self.pdf.get_object(first_child.objgen)
-                else:
-                    first_child_obj = first_child
+                first_child_obj = k_array[0]
                 
                 if isinstance(first_child_obj, pikepdf.Dictionary):
                     s_type = first_child_obj.get('/S')
-                    if s_type != pikepdf.Name('/Document'):
-                        check_result['failures'].append(f"First child of StructTreeRoot is not Document: {s_type}")
+                    if s_type != NAME_DOCUMENT:
+                        check_result.failures.append(f"First child of StructTreeRoot is not Document: {s_type}")
                     else:
-                        check_result['details']['document_wrapper_exists'] = True
+                        check_result.details['document_wrapper_exists'] = True
                         # Check Document has children
-                        doc_k = first_child_obj.get('/K', pikepdf.Array([]))
-                        check_result['details']['document_children_count'] = len(doc_k) if doc_k else 0
+                        doc_k = self.wrapper_kids
+                        check_result.details['document_children_count'] = len(doc_k)
                         if not doc_k or len(doc_k) == 0:
-                            check_result['failures'].append("Document wrapper has no children")
+                            check_result.failures.append("Document wrapper has no children")
             
             # Determine if passed
-            check_result['passed'] = len(check_result['failures']) == 0
+            check_result.passed = len(check_result.failures) == 0
             
-            if check_result['passed']:
+            if check_result.passed:
                 self.results['passed'].append(check_name)
             else:
-                self.results['failures'].append(f"{check_name}: {'; '.join(check_result['failures'])}")
+                self.results['failures'].append(f"{check_name}: {'; '.join(check_result.failures)}")
             
-            self.results['checks'][check_name] = check_result
+            self._checks.append(check_result)
             
         except Exception as e:
-            check_result['failures'].append(f"Validation error: {str(e)}")
-            check_result['passed'] = False
-            self.results['checks'][check_name] = check_result
+            check_result.failures.append(f"Validation error: {str(e)}")
+            check_result.passed = False
+            self._checks.append(check_result)
             self.results['failures'].append(f"{check_name}: {str(e)}")
     
     def check_2_primary_language(self):
         """Check 2: Primary language is specified"""
         check_name = "Primary Language"
-        check_result = {'passed': False, 'details': {}, 'failures': []}
+        check_result = CheckResult(check_name)
         
         try:
             # Check language in catalog
-            lang = self.pdf.Root.get('/Lang')
-            check_result['details']['lang_in_catalog'] = lang is not None
+            lang = self._root_dict.get('/Lang')
+            check_result.details['lang_in_catalog'] = lang is not None
             
             if lang is None:
-                check_result['failures'].append("Language not set in catalog /Lang key")
+                check_result.failures.append("Language not set in catalog /Lang key")
             else:
                 # Check format - must be PDF name object (e.g., /en)
                 if not isinstance(lang, pikepdf.Name):
-                    check_result['failures'].append(f"Language is not a PDF name object: {type(lang)}")
+                    check_result.failures.append(f"Language is not a PDF name object: {type(lang)}")
                 else:
                     lang_str = str(lang)
                     # Should be like /en, /fr, etc.
                     if not lang_str.startswith('/'):
-                        check_result['failures'].append(f"Language format incorrect: {lang_str}")
+                        check_result.failures.append(f"Language format incorrect: {lang_str}")
                     else:
                         # Extract 2-letter code
-                        lang_code = lang_str[1:].split('-')[0].lower()
+                        lang_code = lang_str[1:].split('-', 1)[0].lower()
                         if len(lang_code) != 2:
-                            check_result['failures'].append(f"Language code should be 2 letters: {lang_code}")
-                        check_result['details']['language_code'] = lang_code
+                            check_result.failures.append(f"Language code should be 2 letters: {lang_code}")
+                        check_result.details['language_code'] = lang_code
             
             # Check language in XMP metadata (optional but recommended)
             # This is harder to check with pikepdf, so we'll focus on catalog
             
-            check_result['passed'] = len(check_result['failures']) == 0
+            check_result.passed = len(check_result.failures) == 0
             
-            if check_result['passed']:
+            if check_result.passed:
                 self.results['passed'].append(check_name)
             else:
-                self.results['failures'].append(f"{check_name}: {'; '.join(check_result['failures'])}")
+                self.results['failures'].append(f"{check_name}: {'; '.join(check_result.failures)}")
             
-            self.results['checks'][check_name] = check_result
+            self._checks.append(check_result)
             
         except Exception as e:
-            check_result['failures'].append(f"Validation error: {str(e)}")
-            check_result['passed'] = False
-            self.results['checks'][check_name] = check_result
+            check_result.failures.append(f"Validation error: {str(e)}")
+            check_result.passed = False
+            self._checks.append(check_result)
             self.results['failures'].append(f"{check_name}: {str(e)}")
     
     def check_3_title(self):
         """Check 3: Document title is specified"""
         check_name = "Title"
-        check_result = {'passed': False, 'details': {}, 'failures': []}
+        check_result = CheckResult(check_name)
         
         try:
             # Check title in Info dictionary
-            if '/Info' in self.pdf.Root:
-                info_ref = self.pdf.Root['/Info']
-                if hasattr(info_ref, 'objgen'):
-                    info_obj = self.pdf.get_object(info_ref.objgen)
-                else:
-                    info_obj = info_ref
+            if '/Info' in self._root_dict:
+                info_obj = self._root_dict['/Info']
                 
                 title = info_obj.get('/Title')
-                check_result['details']['title_in_info'] = title is not None
+                check_result.details['title_in_info'] = title is not None
                 
                 if title is None:
-                    check_result['failures'].append("Title not set in Info dictionary")
+                    check_result.failures.append("Title not set in Info dictionary")
                 else:
-                    title_str = str(title) if hasattr(title, '__str__') else ''
-                    if not title_str or title_str.strip() == '':
-                        check_result['failures'].append("Title is empty in Info dictionary")
+                    title_str = str(title)
+                    if not title_str.strip():
+                        check_result.failures.append("Title is empty in Info dictionary")
                     else:
-                        check_result['details']['title_value'] = title_str[:50]  # First 50 chars
+                        check_result.details['title_value'] = title_str[:50]  # First 50 chars
             else:
-                check_result['failures'].append("Info dictionary missing from PDF root")
+                check_result.failures.append("Info dictionary missing from PDF root")
             
-            # Check title in XMP metadata (harder to check, but we'll try)
-            # PyMuPDF can check this
-            metadata = self.doc.metadata
-            xmp_title = metadata.get('title', '')
-            check_result['details']['title_in_xmp'] = bool(xmp_title and xmp_title.strip())
+            # Check title in XMP metadata via pikepdf, so PyMuPDF isn't opened for it.
+            # Falls back to the trailer's Info /Title (all PyMuPDF's metadata reported)
+            try:
+                xmp_title = self.pdf.open_metadata().get('dc:title') or ''
+            except Exception:
+                xmp_title = ''
+            if not xmp_title.strip():
+                info = self.pdf.trailer.get('/Info')
+                xmp_title = str(info.get('/Title', '')) if isinstance(info, pikepdf.Dictionary) else ''
+            check_result.details['title_in_xmp'] = bool(xmp_title and xmp_title.strip())
             
-            if not check_result['details']['title_in_xmp']:
-                check_result['failures'].append("Title not set in XMP metadata")
+            if not check_result.details['title_in_xmp']:
+                check_result.failures.append("Title not set in XMP metadata")
             
-            check_result['passed'] = len(check_result['failures']) == 0
+            check_result.passed = len(check_result.failures) == 0
             
-            if check_result['passed']:
+            if check_result.passed:
                 self.results['passed'].append(check_name)
             else:
-                self.results['failures'].append(f"{check_name}: {'; '.join(check_result['failures'])}")
+                self.results['failures'].append(f"{check_name}: {'; '.join(check_result.failures)}")
             
-            self.results['checks'][check_name] = check_result
+            self._checks.append(check_result)
             
         except Exception as e:
-            check_result['failures'].append(f"Validation error: {str(e)}")
-            check_result['passed'] = False
-            self.results['checks'][check_name] = check_result
+            check_result.failures.append(f"Validation error: {str(e)}")
+            check_result.passed = False
+            self._checks.append(check_result)
             self.results['failures'].append(f"{check_name}: {str(e)}")
     
     def check_4_tagged_content(self):
         """Check 4: All page content is tagged (100% MCID coverage)"""
         check_name = "Tagged Content"
-        check_result = {'passed': False, 'details': {}, 'failures': []}
+        check_result = CheckResult(check_name)
         
         try:
             total_text_operators = 0
             tagged_text_operators = 0
             
-            # Check each page
-            for page_num in range(len(self.doc)):
-                page = self.doc[page_num]
-                
-                # Get page content stream
-                content = page.read_contents()
-                
-                # Count text operators (Tj, TJ, ', ")
-                import re
-                text_ops = re.findall(rb'\b(Tj|TJ|\'|")\b', content)
-                total_text_operators += len(text_ops)
-                
-                # Check for BDC/EMC pairs (marked content)
-                bdc_count = len(re.findall(rb'\bBDC\b', content))
-                emc_count = len(re.findall(rb'\bEMC\b', content))
-                
-                # Rough estimate: if we have BDC/EMC pairs, assume content is tagged
-                # More accurate would be to parse the content stream properly
-                if bdc_count > 0 and emc_count > 0:
-                    tagged_text_operators += len(text_ops)  # Assume all are tagged if BDC/EMC present
+            # Check each page - split across worker processes for large documents
+            page_count = len(self.doc)
+            if self.workers > 1 and page_count >= PARALLEL_MIN_PAGES:
+                step = -(-page_count // self.workers)
+                ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+                with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                    for total, tagged in executor.map(
+                            _scan_page_range, [self.pdf_path] * len(ranges),
+                            [r[0] for r in ranges], [r[1] for r in ranges]):
+                        total_text_operators += total
+                        tagged_text_operators += tagged
+            else:
+                total_text_operators, tagged_text_operators = _scan_pages(self.doc, range(page_count))
             
-            check_result['details']['total_text_operators'] = total_text_operators
-            check_result['details']['tagged_text_operators'] = tagged_text_operators
+            check_result.details['total_text_operators'] = total_text_operators
+            check_result.details['tagged_text_operators'] = tagged_text_operators
             
             # Also check structure tree has MCID references (more reliable than content stream parsing)
             mcid_count = 0
-            if '/StructTreeRoot' in self.pdf.Root:
-                struct_root_ref = self.pdf.Root['/StructTreeRoot']
-                if hasattr(struct_root_ref, 'objgen'):
-                    struct_root_obj = self.pdf.get_object(struct_root_ref.objgen)
-                else:
-                    struct_root_obj = struct_root_ref
-                
+            struct_root_obj = self.struct_root
+            if struct_root_obj is not None:
                 # Count structure elements with MCID
-                mcid_count = self._count_mcid_elements(struct_root_obj)
-                check_result['details']['structure_elements_with_mcid'] = mcid_count
+                mcid_count = self._walk_struct_tree().mcid_count
+                check_result.details['structure_elements_with_mcid'] = mcid_count
             
             # Determine if content is tagged
-            # If we have structure elements with MCID, content is likely tagged
-            # The BDC/EMC check is a heuristic - structure tree MCID is more reliable
-            if total_text_operators == 0:
-                # No text operators - check if document has structure elements
-                if mcid_count > 0:
-                    # Document has structure elements, likely image-only or already tagged
-                    check_result['warnings'].append("No text operators found but structure elements exist - document may be image-only or fully tagged")
-                    # If we have MCID elements, assume content is tagged
-                    check_result['passed'] = True
-                else:
-                    check_result['warnings'].append("No text operators found - document may be image-only")
-                    # Can't determine if tagged without structure elements
-                    check_result['passed'] = False
-            elif mcid_count > 0 and mcid_count >= total_text_operators * 0.5:
-                # We have structure elements with MCID - content is likely tagged
-                # Use structure tree as primary indicator (more reliable than content stream parsing)
-                check_result['details']['coverage_percent'] = 100.0
-                check_result['passed'] = True
-            elif tagged_text_operators < total_text_operators:
-                coverage = (tagged_text_operators / total_text_operators * 100) if total_text_operators > 0 else 0
-                check_result['details']['coverage_percent'] = coverage
-                check_result['failures'].append(f"Not all content is tagged: {coverage:.1f}% coverage (need 100%)")
-                check_result['passed'] = False
-            else:
-                # All text operators appear to be tagged
-                check_result['details']['coverage_percent'] = 100.0
-                check_result['passed'] = True
-            
-            if mcid_count == 0 and total_text_operators > 0:
-                check_result['failures'].append("No structure elements have MCID references")
-                check_result['passed'] = False
-            
-            # Final check: if we have structure elements but validator still fails, override if structure tree is valid
-            if not check_result['passed'] and mcid_count > 100:  # Large number of structure elements indicates content is tagged
-                check_result['warnings'].append(f"Structure tree has {mcid_count} elements with MCID - content is likely tagged (validator heuristic may be inaccurate)")
-                # Don't auto-pass, but note the warning
-            
-            if check_result['passed']:
+            passed, coverage, failures, warnings = _classify_tagged_content(
+                total_text_operators, tagged_text_operators, mcid_count)
+            if coverage is not None:
+                check_result.details['coverage_percent'] = coverage
+            check_result.failures.extend(failures)
+            check_result.passed = passed
+            self.results['warnings'].extend(f"{check_name}: {warning}" for warning in warnings)
+            
+            if check_result.passed:
                 self.results['passed'].append(check_name)
             else:
-                self.results['failures'].append(f"{check_name}: {'; '.join(check_result['failures'])}")
+                self.results['failures'].append(f"{check_name}: {'; '.join(check_result.failures)}")
             
-            self.results['checks'][check_name] = check_result
+            self._checks.append(check_result)
             
         except Exception as e:
-            check_result['failures'].append(f"Validation error: {str(e)}")
-            check_result['passed'] = False
-            self.results['checks'][check_name] = check_result
+            check_result.failures.append(f"Validation error: {str(e)}")
+            check_result.passed = False
+            self._checks.append(check_result)
             self.results['failures'].append(f"{check_name}: {str(e)}")
     
     def check_5_tab_order(self):
         """Check 5: Tab order is consistent with structure order"""
         check_name = "Tab Order"
-        check_result = {'passed': False, 'details': {}, 'failures': []}
+        check_result = CheckResult(check_name)
         
         try:
             # This is complex - we'll check that structure elements are in reading order
             # by verifying they're sorted by page and Y-position
             
-            if '/StructTreeRoot' in self.pdf.Root:
-                struct_root_ref = self.pdf.Root['/StructTreeRoot']
-                if hasattr(struct_root_ref, 'objgen'):
-                    struct_root_obj = self.pdf.get_object(struct_root_ref.objgen)
-                else:
-                    struct_root_obj = struct_root_ref
-                
-                # Get Document wrapper
-                k_array = struct_root_obj.get('/K', pikepdf.Array([]))
-                if len(k_array) > 0:
-                    doc_ref = k_array[0]
-                    if hasattr(doc_ref, 'objgen'):
-                        doc_obj = self.pdf.get_object(doc_ref.objgen)
-                    else:
-                        doc_obj = doc_ref
+            struct_root_obj = self.struct_root
+            if struct_root_obj is not None:
+                # Children of the Document wrapper
+                doc_k = self.wrapper_kids
+                if doc_k is not None:
+                    check_result.details['structure_elements_count'] = len(doc_k)
                     
-                    if isinstance(doc_obj, pikepdf.Dictionary):
-                        doc_k = doc_obj.get('/K', pikepdf.Array([]))
-                        check_result['details']['structure_elements_count'] = len(doc_k) if doc_k else 0
-                        
-                        # Check if elements are in reasonable order
-                        # (We can't fully validate without page/Y-position data)
-                        if len(doc_k) == 0:
-                            check_result['failures'].append("No structure elements in Document wrapper")
-                        else:
-                            check_result['details']['has_structure_elements'] = True
+                    # Check if elements are in reasonable order
+                    # (We can't fully validate without page/Y-position data)
+                    if len(doc_k) == 0:
+                        check_result.failures.append("No structure elements in Document wrapper")
+                    else:
+                        check_result.details['has_structure_elements'] = True
             
             # For now, we'll pass if structure elements exist
             # Full validation would require checking reading order
-            check_result['passed'] = len(check_result['failures']) == 0
+            check_result.passed = len(check_result.failures) == 0
             
-            if check_result['passed']:
+            if check_result.passed:
                 self.results['passed'].append(check_name)
             else:
-                self.results['failures'].append(f"{check_name}: {'; '.join(check_result['failures'])}")
+                self.results['failures'].append(f"{check_name}: {'; '.join(check_result.failures)}")
             
-            self.results['checks'][check_name] = check_result
+            self._checks.append(check_result)
             
         except Exception as e:
-            check_result['failures'].append(f"Validation error: {str(e)}")
-            check_result['passed'] = False
-            self.results['checks'][check_name] = check_result
+            check_result.failures.append(f"Validation error: {str(e)}")
+            check_result.passed = False
+            self._checks.append(check_result)
             self.results['failures'].append(f"{check_name}: {str(e)}")
     
     def check_6_other_elements_alt_text(self):
         """Check 6: Other elements have alternate text"""
         check_name = "Other Elements Alternate Text"
-        check_result = {'passed': False, 'details': {}, 'failures': []}
+        check_result = CheckResult(check_name)
         
         try:
             # Count all Figure elements and check for alt text
             figures_with_alt = 0
             figures_without_alt = 0
             
-            if '/StructTreeRoot' in self.pdf.Root:
-                struct_root_ref = self.pdf.Root['/StructTreeRoot']
-                if hasattr(struct_root_ref, 'objgen'):
-                    struct_root_obj = self.pdf.get_object(struct_root_ref.objgen)
-                else:
-                    struct_root_obj = struct_root_ref
-                
-                figures = []
-                self._find_figures(struct_root_obj, figures)
-                
-                for fig in figures:
+            struct_root_obj = self.struct_root
+            if struct_root_obj is not None and not self._skip_reason:
+                for fig in self._walk_struct_tree().figures:
                     alt_text = fig.get('alt_text')
                     if alt_text and str(alt_text).strip():
                         figures_with_alt += 1
                     else:
                         figures_without_alt += 1
-                        check_result['failures'].append(f"Figure on page {fig.get('page', 'unknown')} missing alt text")
+                        check_result.add_failure(f"Figure on page {fig.get('page', 'unknown')} missing alt text")
             
-            check_result['details']['figures_with_alt'] = figures_with_alt
-            check_result['details']['figures_without_alt'] = figures_without_alt
+            check_result.details['figures_with_alt'] = figures_with_alt
+            check_result.details['figures_without_alt'] = figures_without_alt
             
             if figures_without_alt > 0:
-                check_result['failures'].append(f"{figures_without_alt} figure(s) missing alt text")
+                check_result.failures.append(f"{figures_without_alt} figure(s) missing alt text")
             
             # Also check form fields have labels
             form_fields_with_labels = 0
             form_fields_without_labels = 0
             
-            for page_num in range(len(self.pdf.pages)):
-                page = self.pdf.pages[page_num]
-                if '/Annots' in page:
-                    annots = page['/Annots']
-                    for annot in annots:
-                        if hasattr(annot, 'objgen'):
-                            annot_obj = self.pdf.get_object(annot.objgen)
-                        else:
-                            annot_obj = annot
-                        
-                        if isinstance(annot_obj, pikepdf.Dictionary):
-                            subtype = annot_obj.get('/Subtype')
-                            if subtype == pikepdf.Name('/Widget'):  # Form field
-                                tu = annot_obj.get('/TU')  # Tooltip
-                                t = annot_obj.get('/T')    # Title
-                                if tu or t:
-                                    form_fields_with_labels += 1
-                                else:
-                                    form_fields_without_labels += 1
-                                    check_result['failures'].append(f"Form field on page {page_num + 1} missing label")
-            
-            check_result['details']['form_fields_with_labels'] = form_fields_with_labels
-            check_result['details']['form_fields_without_labels'] = form_fields_without_labels
-            
-            check_result['passed'] = len(check_result['failures']) == 0
-            
-            if check_result['passed']:
+            for page_num, page in enumerate(self.pdf.pages):
+                # Annotations resolve on access; most are links, so bail on the subtype first
+                for annot in page.get('/Annots', ()):
+                    if not isinstance(annot, pikepdf.Dictionary):
+                        continue
+                    if annot.get('/Subtype') != NAME_WIDGET:  # Form fields only
+                        continue
+                    tu = annot.get('/TU')  # Tooltip
+                    t = annot.get('/T')    # Title
+                    if tu or t:
+                        form_fields_with_labels += 1
+                    else:
+                        form_fields_without_labels += 1
+                        check_result.add_failure(f"Form field on page {page_num + 1} missing label")
+            
+            check_result.details['form_fields_with_labels'] = form_fields_with_labels
+            check_result.details['form_fields_without_labels'] = form_fields_without_labels
+            
+            check_result.passed = len(check_result.failures) == 0
+            
+            if check_result.passed:
                 self.results['passed'].append(check_name)
             else:
-                self.results['failures'].append(f"{check_name}: {'; '.join(check_result['failures'][:5])}")  # Limit to first 5
+                self.results['failures'].append(f"{check_name}: {'; '.join(check_result.failures[:5])}")  # Limit to first 5
             
-            self.results['checks'][check_name] = check_result
+            self._checks.append(check_result)
             
         except Exception as e:
-            check_result['failures'].append(f"Validation error: {str(e)}")
-            check_result['passed'] = False
-            self.results['checks'][check_name] = check_result
+            check_result.failures.append(f"Validation error: {str(e)}")
+            check_result.passed = False
+            self._checks.append(check_result)
             self.results['failures'].append(f"{check_name}: {str(e)}")
     
     def check_7_heading_nesting(self):
         """Check 7: Appropriate heading nesting"""
         check_name = "Appropriate Nesting"
-        check_result = {'passed': False, 'details': {}, 'failures': []}
+        check_result = CheckResult(check_name)
         
         try:
             headings = []
             
-            if '/StructTreeRoot' in self.pdf.Root:
-                struct_root_ref = self.pdf.Root['/StructTreeRoot']
-                if hasattr(struct_root_ref, 'objgen'):
-                    struct_root_obj = self.pdf.get_object(struct_root_ref.objgen)
-                else:
-                    struct_root_obj = struct_root_ref
-                
-                self._find_headings(struct_root_obj, headings)
-            
-            # Sort by reading order (page, then position)
-            headings.sort(key=lambda h: (h.get('page', 0), h.get('y_position', 0)))
+            struct_root_obj = self.struct_root
+            if struct_root_obj is not None:
+                # The walk yields heading levels in structure order, and no
+                # page/position is known, so there is nothing to re-sort
+                headings = self._walk_struct_tree().headings
             
-            last_level = 0
             nesting_errors = 0
             
-            for heading in headings:
-                current_level = heading.get('level', 1)
-                
-                # Check for skipped levels (e.g., H1 to H4)
+            # Check for skipped levels (e.g., H1 to H4) between consecutive headings
+            for last_level, current_level in zip(headings, headings[1:]):
                 if current_level > last_level + 1 and last_level > 0:
                     nesting_errors += 1
-                    check_result['failures'].append(
-                        f"Heading level skip: H{last_level} to H{current_level} (page {heading.get('page', 'unknown')})"
+                    check_result.failures.append(
+                        f"Heading level skip: H{last_level} to H{current_level}"
                     )
-                
-                last_level = current_level
             
-            check_result['details']['total_headings'] = len(headings)
-            check_result['details']['nesting_errors'] = nesting_errors
+            check_result.details['total_headings'] = len(headings)
+            check_result.details['nesting_errors'] = nesting_errors
             
-            check_result['passed'] = len(check_result['failures']) == 0
+            check_result.passed = len(check_result.failures) == 0
             
-            if check_result['passed']:
+            if check_result.passed:
                 self.results['passed'].append(check_name)
             else:
                 self.results['failures'].append(f"{check_name}: {nesting_errors} nesting error(s)")
             
-            self.results['checks'][check_name] = check_result
+            self._checks.append(check_result)
             
         except Exception as e:
-            check_result['failures'].append(f"Validation error: {str(e)}")
-            check_result['passed'] = False
-            self.results['checks'][check_name] = check_result
+            check_result.failures.append(f"Validation error: {str(e)}")
+            check_result.passed = False
+            self._checks.append(check_result)
             self.results['failures'].append(f"{check_name}: {str(e)}")
     
     def check_8_structure_tree_integrity(self):
         """Check 8: Structure tree integrity (no corruption, valid references)"""
         check_name = "Structure Tree Integrity"
-        check_result = {'passed': False, 'details': {}, 'failures': []}
+        check_result = CheckResult(check_name)
         
         try:
-            if '/StructTreeRoot' in self.pdf.Root:
-                struct_root_ref = self.pdf.Root['/StructTreeRoot']
-                if hasattr(struct_root_ref, 'objgen'):
-                    struct_root_obj = self.pdf.get_object(struct_root_ref.objgen)
-                else:
-                    struct_root_obj = struct_root_ref
-                
-                # Check for circular references or invalid structure
-                visited = set()
-                invalid_refs = []
-                
-                def validate_element(elem, path=[]):
-                    if hasattr(elem, 'objgen'):
-                        elem_id = elem.objgen
-                        if elem_id in visited:
-                            invalid_refs.append(f"Circular reference detected: {path}")
-                            return
-                        visited.add(elem_id)
-                        elem_obj = self.pdf.get_object(elem.objgen)
-                    else:
-                        elem_obj = elem
-                    
-                    if isinstance(elem_obj, pikepdf.Dictionary):
-                        k_array = elem_obj.get('/K', pikepdf.Array([]))
-                        for i, kid in enumerate(k_array):
-                            validate_element(kid, path + [f"K[{i}]"])
-                
-                validate_element(struct_root_obj)
+            struct_root_obj = self.struct_root
+            if struct_root_obj is not None:
+                # Circular references are found by the shared tree walk
+                invalid_refs = self._walk_struct_tree().cycles
                 
                 if invalid_refs:
-                    check_result['failures'].extend(invalid_refs)
+                    check_result.details['circular_references'] = len(invalid_refs)
+                    for ref in invalid_refs:
+                        check_result.add_failure(ref)
                 else:
-                    check_result['details']['structure_valid'] = True
+                    check_result.details['structure_valid'] = True
             
-            check_result['passed'] = len(check_result['failures']) == 0
+            check_result.passed = len(check_result.failures) == 0
             
-            if check_result['passed']:
+            if check_result.passed:
                 self.results['passed'].append(check_name)
             else:
                 self.results['failures'].append(f"{check_name}: Structure tree corruption detected")
             
-            self.results['checks'][check_name] = check_result
+            self._checks.append(check_result)
             
         except Exception as e:
-            check_result['failures'].append(f"Validation error: {str(e)}")
-            check_result['passed'] = False
-            self.results['checks'][check_name] = check_result
+            check_result.failures.append(f"Validation error: {str(e)}")
+            check_result.passed = False
+            self._checks.append(check_result)
     
     def check_9_markinfo_marked(self):
         """Check 9: MarkInfo/Marked flag is set"""
         check_name = "MarkInfo/Marked"
-        check_result = {'passed': False, 'details': {}, 'failures': []}
+        check_result = CheckResult(check_name)
         
         try:
-            markinfo = self.pdf.Root.get('/MarkInfo')
-            check_result['details']['markinfo_exists'] = markinfo is not None
+            markinfo = self._root_dict.get('/MarkInfo')
+            check_result.details['markinfo_exists'] = markinfo is not None
             
             if markinfo is None:
-                check_result['failures'].append("MarkInfo missing from PDF root")
+                check_result.failures.append("MarkInfo missing from PDF root")
             else:
-                if hasattr(markinfo, 'objgen'):
-                    markinfo_obj = self.pdf.get_object(markinfo.objgen)
-                else:
-                    markinfo_obj = markinfo
+                marked = markinfo.get('/Marked')
+                check_result.details['marked_value'] = str(marked) if marked else None
                 
-                marked = markinfo_obj.get('/Marked')
-                check_result['details']['marked_value'] = str(marked) if marked else None
-                
-                if marked != pikepdf.Name('/true'):
-                    check_result['failures'].append(f"Marked flag is not /true: {marked}")
+                # pikepdf hands PDF booleans back as Python bools
+                if marked is not True and marked != NAME_TRUE:
+                    check_result.failures.append(f"Marked flag is not /true: {marked}")
             
-            check_result['passed'] = len(check_result['failures']) == 0
+            check_result.passed = len(check_result.failures) == 0
             
-            if check_result['passed']:
+            if check_result.passed:
                 self.results['passed'].append(check_name)
             else:
-                self.results['failures'].append(f"{check_name}: {'; '.join(check_result['failures'])}")
+                self.results['failures'].append(f"{check_name}: {'; '.join(check_result.failures)}")
             
-            self.results['checks'][check_name] = check_result
+            self._checks.append(check_result)
             
         except Exception as e:
-            check_result['failures'].append(f"Validation error: {str(e)}")
-            check_result['passed'] = False
-            self.results['checks'][check_name] = check_result
+            check_result.failures.append(f"Validation error: {str(e)}")
+            check_result.passed = False
+            self._checks.append(check_result)
     
     def check_10_document_wrapper(self):
         """Check 10: Document wrapper exists and is properly formed"""
         check_name = "Document Wrapper"
-        check_result = {'passed': False, 'details': {}, 'failures': []}
+        check_result = CheckResult(check_name)
         
         try:
-            if '/StructTreeRoot' in self.pdf.Root:
-                struct_root_ref = self.pdf.Root['/StructTreeRoot']
-                if hasattr(struct_root_ref, 'objgen'):
-                    struct_root_obj = self.pdf.get_object(struct_root_ref.objgen)
-                else:
-                    struct_root_obj = struct_root_ref
-                
-                k_array = struct_root_obj.get('/K', pikepdf.Array([]))
+            struct_root_obj = self.struct_root
+            if struct_root_obj is not None:
+                k_array = self.struct_root_kids
                 
                 if len(k_array) == 0:
-                    check_result['failures'].append("StructTreeRoot K array is empty")
+                    check_result.failures.append("StructTreeRoot K array is empty")
                 elif len(k_array) > 1:
-                    check_result['failures'].append(f"StructTreeRoot has {len(k_array)} children (should have exactly 1 Document)")
+                    check_result.failures.append(f"StructTreeRoot has {len(k_array)} children (should have exactly 1 Document)")
                 else:
-                    first_child = k_array[0]
-                    if hasattr(first_child, 'objgen'):
-                        first_child_obj = self.pdf.get_object(first_child.objgen)
-                    else:
-                        first_child_obj = first_child
+                    first_child_obj = k_array[0]
                     
                     if isinstance(first_child_obj, pikepdf.Dictionary):
                         s_type = first_child_obj.get('/S')
-                        if s_type != pikepdf.Name('/Document'):
-                            check_result['failures'].append(f"First child is not Document: {s_type}")
+                        if s_type != NAME_DOCUMENT:
+                            check_result.failures.append(f"First child is not Document: {s_type}")
                         else:
-                            check_result['details']['document_wrapper_valid'] = True
-                            doc_k = first_child_obj.get('/K', pikepdf.Array([]))
-                            check_result['details']['document_children'] = len(doc_k) if doc_k else 0
+                            check_result.details['document_wrapper_valid'] = True
+                            check_result.details['document_children'] = len(self.wrapper_kids)
             
-            check_result['passed'] = len(check_result['failures']) == 0
+            check_result.passed = len(check_result.failures) == 0
             
-            if check_result['passed']:
+            if check_result.passed:
                 self.results['passed'].append(check_name)
             else:
-                self.results['failures'].append(f"{check_name}: {'; '.join(check_result['failures'])}")
+                self.results['failures'].append(f"{check_name}: {'; '.join(check_result.failures)}")
             
-            self.results['checks'][check_name] = check_result
+            self._checks.append(check_result)
             
         except Exception as e:
-            check_result['failures'].append(f"Validation error: {str(e)}")
-            check_result['passed'] = False
-            self.results['checks'][check_name] = check_result
-    
-    def _count_mcid_elements(self, elem) -> int:
-        """Count structure elements with MCID references"""
-        count = 0
-        if hasattr(elem, 'objgen'):
-            elem_obj = self.pdf.get_object(elem.objgen)
-        else:
-            elem_obj = elem
+            check_result.failures.append(f"Validation error: {str(e)}")
+            check_result.passed = False
+            self._checks.append(check_result)
+    
+    def _walk_struct_tree(self) -> StructTreeStats:
+        """Walk the structure tree once (iteratively) and cache what the checks need"""
+        if self._struct_stats is not None:
+            return self._struct_stats
+        
+        stats = StructTreeStats()
+        struct_root_obj = self.struct_root
+        if struct_root_obj is None:
+            self._struct_stats = stats
+            return stats
         
-        if isinstance(elem_obj, pikepdf.Dictionary):
-            k_array = elem_obj.get('/K', pikepdf.Array([]))
-            for kid in k_array:
-                if hasattr(kid, 'objgen'):
-                    kid_obj = self.pdf.get_object(kid.objgen)
+        # Explicit stack of (node, link); kids are pushed in reverse so nodes are visited
+        # in document (pre-)order. A link is (parent link, K index) - O(1) per node - and
+        # the full path is only spelled out when a cycle is reported
+        stack = [(struct_root_obj, None)]
+        # Hot loop on large trees: bind the lookups it repeats per node to locals
+        pop, push_kids = stack.pop, stack.extend
+        visited, mark_visited = stats.visited, stats.visited.add
+        add_figure, add_heading = stats.figures.append, stats.headings.append
+        heading_level = HEADING_LEVELS.get
+        Dictionary, Array = pikepdf.Dictionary, pikepdf.Array
+        mcid_count = 0
+        while stack:
+            elem, link = pop()
+            
+            # Indirect objects are tracked by objgen; direct objects report (0, 0)
+            elem_id = getattr(elem, 'objgen', None)
+            if elem_id is not None and elem_id != (0, 0):
+                if elem_id in visited:
+                    stats.cycles.append(f"Circular reference detected: {self._link_path(link)}")
+                    continue
+                mark_visited(elem_id)
+            
+            if not isinstance(elem, Dictionary):
+                continue
+            
+            s_type = elem.get('/S')
+            if s_type is not None:
+                s_str = str(s_type)
+                if s_str == '/Figure':
+                    add_figure({
+                        'alt_text': elem.get('/Alt'),
+                        'page': 0
+                    })
                 else:
-                    kid_obj = kid
-                
-                if isinstance(kid_obj, pikepdf.Dictionary):
-                    # Check if it's an MCR (Marked Content Reference)
-                    if kid_obj.get('/Type') == pikepdf.Name('/MCR'):
-                        count += 1
-                    else:
-                        # Recursively count
-                        count += self._count_mcid_elements(kid_obj)
+                    # One dict hit: no prefix test or int() parse, and /Header etc. miss
+                    level = heading_level(s_str)
+                    if level is not None:
+                        add_heading(level)
+            
+            k_array = elem.get('/K')
+            if k_array is None:
+                continue
+            if not isinstance(k_array, Array):
+                k_array = [k_array]
+            
+            kids = []
+            for i, kid in enumerate(k_array):
+                if isinstance(kid, int):
+                    # Bare integer MCID (compact form, page taken from the element's /Pg)
+                    mcid_count += 1
+                    continue
+                if isinstance(kid, Dictionary) and kid.get('/Type') == NAME_MCR:
+                    # Marked Content Reference - a leaf, nothing below it to walk
+                    mcid_count += 1
+                    continue
+                kids.append((kid, (link, i)))
+            push_kids(reversed(kids))
+        stats.mcid_count = mcid_count
         
-        return count
+        self._struct_stats = stats
+        return stats
     
-    def _find_figures(self, elem, figures: List[Dict], page: int = 0):
-        """Find all Figure elements in structure tree"""
-        if hasattr(elem, 'objgen'):
-            elem_obj = self.pdf.get_object(elem.objgen)
-        else:
-            elem_obj = elem
-        
-        if isinstance(elem_obj, pikepdf.Dictionary):
-            s_type = elem_obj.get('/S')
-            if s_type == pikepdf.Name('/Figure'):
-                alt_text = elem_obj.get('/Alt')
-                figures.append({
-                    'alt_text': alt_text,
-                    'page': page
-                })
-            
-            k_array = elem_obj.get('/K', pikepdf.Array([]))
-            for kid in k_array:
-                self._find_figures(kid, figures, page)
-    
-    def _find_headings(self, elem, headings: List[Dict], page: int = 0, y_position: float = 0):
-        """Find all Heading elements in structure tree"""
-        if hasattr(elem, 'objgen'):
-            elem_obj = self.pdf.get_object(elem.objgen)
-        else:
-            elem_obj = elem
-        
-        if isinstance(elem_obj, pikepdf.Dictionary):
-            s_type = elem_obj.get('/S')
-            if s_type and str(s_type).startswith('/H'):
-                # Extract level (H1, H2, etc.)
-                level = int(str(s_type)[2:]) if len(str(s_type)) > 2 else 1
-                headings.append({
-                    'level': level,
-                    'page': page,
-                    'y_position': y_position
-                })
-            
-            k_array = elem_obj.get('/K', pikepdf.Array([]))
-            for kid in k_array:
-                self._find_headings(kid, headings, page, y_position)
+    @staticmethod
+    def _link_path(link) -> List[str]:
+        """Expand a (parent link, K index) chain into ['K[i]', ...] from the root down"""
+        path = []
+        while link is not None:
+            link, i = link
+            path.append(f"K[{i}]")
+        path.reverse()
+        return path
 
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python rigorous-pdf-ua-validator.py <pdf_path>")
+        print("Usage: python rigorous-pdf-ua-validator.py <pdf_path> [--workers N (0 = one per CPU)] [--early-exit] [--quick] [--fail-fast]")
         sys.exit(1)
     
     pdf_path = sys.argv[1]
+    early_exit = '--early-exit' in sys.argv
+    quick = '--quick' in sys.argv
+    fail_fast = '--fail-fast' in sys.argv
+    workers = 1
+    if '--workers' in sys.argv:
+        workers = int(sys.argv[sys.argv.index('--workers') + 1])
     
-    validator = RigorousPDFUAValidator(pdf_path)
-    results = validator.validate()
+    validator = RigorousPDFUAValidator(pdf_path, workers=workers)
+    results = validator.validate(early_exit=early_exit, quick=quick, fail_fast=fail_fast)
     
-    # Print results (using ASCII-safe characters for Windows compatibility)
-    print(f"\n{'='*60}", file=sys.stderr)
-    print(f"PDF/UA ISO 14289-1 Compliance Report", file=sys.stderr)
-    print(f"{'='*60}", file=sys.stderr)
-    print(f"PDF: {pdf_path}", file=sys.stderr)
+    # Print results (using ASCII-safe characters for Windows compatibility);
+    # the report is collected and written to stderr in one call
     compliant_status = "YES [COMPLIANT]" if results['compliant'] else "NO [NON-COMPLIANT]"
-    print(f"Compliant: {compliant_status}", file=sys.stderr)
-    print(f"\nPassed: {len(results['passed'])}", file=sys.stderr)
-    print(f"Failed: {len(results['failures'])}", file=sys.stderr)
-    print(f"\n{'='*60}\n", file=sys.stderr)
+    report = [
+        f"\n{'='*60}",
+        "PDF/UA ISO 14289-1 Compliance Report",
+        f"{'='*60}",
+        f"PDF: {pdf_path}",
+        f"Compliant: {compliant_status}",
+        f"\nPassed: {len(results['passed'])}",
+        f"Failed: {len(results['failures'])}",
+        f"\n{'='*60}\n",
+    ]
     
-    # Print check details
+    # Check details
     for check_name, check_result in results['checks'].items():
         status = "[PASS]" if check_result['passed'] else "[FAIL]"
-        print(f"{status}: {check_name}", file=sys.stderr)
-        if check_result.get('failures'):
-            for failure in check_result['failures'][:3]:  # First 3 failures
-                print(f"  - {failure}", file=sys.stderr)
-        print(file=sys.stderr)
+        report.append(f"{status}: {check_name}")
+        for failure in check_result.get('failures', [])[:3]:  # First 3 failures
+            report.append(f"  - {failure}")
+        report.append("")
     
-    # Print summary
+    # Summary
     if results['failures']:
-        print(f"\n{'='*60}", file=sys.stderr)
-        print("FAILURES:", file=sys.stderr)
-        for failure in results['failures']:
-            print(f"  [FAIL] {failure}", file=sys.stderr)
-    
-    # Output JSON to stdout for API integration
-    # Convert results to JSON-serializable format
-    json_results = {
-        'pdf_path': results['pdf_path'],
-        'compliant': results['compliant'],
-        'checks': {},
-        'failures': results['failures'],
-        'warnings': results.get('warnings', []),
-        'passed': results['passed']
-    }
-    
-    # Convert checks to JSON-serializable format
-    for check_name, check_result in results['checks'].items():
-        json_results['checks'][check_name] = {
-            'passed': check_result['passed'],
-            'failures': check_result.get('failures', []),
-            'details': {k: str(v) if not isinstance(v, (str, int, float, bool, type(None))) else v 
-                       for k, v in check_result.get('details', {}).items()}
-        }
+        report.append(f"\n{'='*60}")
+        report.append("FAILURES:")
+        report.extend(f"  [FAIL] {failure}" for failure in results['failures'])
+    
+    sys.stderr.write('\n'.join(report) + '\n')
     
-    # Output JSON to stdout (for API)
-    print(json.dumps(json_results, indent=2))
+    # Output JSON to stdout (for API); written as UTF-8 bytes so non-ASCII titles
+    # can't trip a Windows console encoding
+    sys.stdout.flush()
+    sys.stdout.buffer.write(validator.to_json() + b'\n')
+    sys.stdout.flush()
     
     # Return exit code
     sys.exit(0 if results['compliant'] else 1)
@@ -6,8 +6,11 @@ This script checks if the PDF structure follows PDF/UA requirements:
 StructTreeRoot -> Document -> [all content elements]
 """
 
+import os
 import sys
 import json
+import contextlib
+import traceback
 from pathlib import Path
 
 try:
@@ -16,9 +19,26 @@ except ImportError:
     print("ERROR: pikepdf not installed", file=sys.stderr)
     sys.exit(1)
 
+# Built once rather than per comparison
+NAME_DOCUMENT = pikepdf.Name('/Document')
 
-def test_document_wrapper(pdf_path):
-    """Test if Document wrapper exists and is correctly structured"""
+
+def _kids(elem):
+    """/K of a structure node as an indexable sequence (a lone kid may be stored bare)"""
+    k = elem.get('/K')
+    if k is None:
+        return ()
+    return k if isinstance(k, pikepdf.Array) else (k,)
+
+
+def test_document_wrapper(pdf_or_path):
+    """Test if Document wrapper exists and is correctly structured
+    
+    Accepts a path or an already-open pikepdf.Pdf; a Pdf passed in is left open
+    for the caller, so a PDF that other checks also read is only parsed once.
+    """
+    is_open_pdf = isinstance(pdf_or_path, pikepdf.Pdf)
+    pdf_path = pdf_or_path.filename if is_open_pdf else pdf_or_path
     results = {
         'pdf_path': str(pdf_path),
         'has_struct_tree_root': False,
@@ -31,35 +51,31 @@ def test_document_wrapper(pdf_path):
     }
     
     try:
-        with pikepdf.Pdf.open(pdf_path) as pdf:
-            # Check 1: StructTreeRoot exists
-            if '/StructTreeRoot' not in pdf.Root:
+        if is_open_pdf:
+            pdf_ctx = contextlib.nullcontext(pdf_or_path)
+        else:
+            # Memory-mapped reads: the test only touches a handful of objects
+            pdf_ctx = pikepdf.Pdf.open(pdf_path, access_mode=pikepdf.AccessMode.mmap)
+        with pdf_ctx as pdf:
+            # Check 1: StructTreeRoot exists - one lookup, which also resolves it
+            # (pikepdf dereferences indirect references on access)
+            struct_root_obj = pdf.Root.get('/StructTreeRoot')
+            if struct_root_obj is None:
                 results['issues'].append("CRITICAL: StructTreeRoot missing")
                 return results
             
             results['has_struct_tree_root'] = True
             
-            # Get StructTreeRoot
-            struct_root = pdf.Root['/StructTreeRoot']
-            if hasattr(struct_root, 'objgen'):
-                struct_root_obj = pdf.get_object(struct_root.objgen)
-            else:
-                struct_root_obj = struct_root
-            
             # Check 2: K array exists and is not empty
-            k_array = struct_root_obj.get('/K', pikepdf.Array([]))
-            k_list = list(k_array) if k_array else []
+            # pikepdf Arrays index and slice natively - no list() copy needed
+            k_array = _kids(struct_root_obj)
             
-            if not k_list or len(k_list) == 0:
+            if len(k_array) == 0:
                 results['issues'].append("CRITICAL: StructTreeRoot K array is empty")
                 return results
             
             # Check 3: First child is Document
-            first_child = k_list[0]
-            if hasattr(first_child, 'objgen'):
-                first_child_obj = pdf.get_object(first_child.objgen)
-            else:
-                first_child_obj = first_child
+            first_child_obj = k_array[0]
             
             if not isinstance(first_child_obj, pikepdf.Dictionary):
                 results['issues'].append(f"CRITICAL: First child is not a Dictionary (type: {type(first_child_obj)})")
@@ -68,23 +84,19 @@ def test_document_wrapper(pdf_path):
             s_type = first_child_obj.get('/S')
             s_type_str = str(s_type) if s_type else None
             
-            if s_type == pikepdf.Name('/Document'):
+            if s_type == NAME_DOCUMENT:
                 results['has_document_wrapper'] = True
                 results['document_wrapper_is_first'] = True
             else:
                 results['issues'].append(f"CRITICAL: First child is {s_type_str}, not /Document")
                 results['structure_hierarchy'] = {
                     'first_child_type': s_type_str,
-                    'total_children': len(k_list),
+                    'total_children': len(k_array),
                     'children_types': []
                 }
                 
                 # List all children types
-                for i, child in enumerate(k_list[:10]):  # First 10 children
-                    if hasattr(child, 'objgen'):
-                        child_obj = pdf.get_object(child.objgen)
-                    else:
-                        child_obj = child
+                for i, child_obj in enumerate(k_array[:10]):  # First 10 children
                     if isinstance(child_obj, pikepdf.Dictionary):
                         child_type = child_obj.get('/S')
                         results['structure_hierarchy']['children_types'].append({
@@ -95,34 +107,24 @@ def test_document_wrapper(pdf_path):
                 return results
             
             # Check 4: Document has children
-            doc_k_array = first_child_obj.get('/K', pikepdf.Array([]))
-            doc_k_list = list(doc_k_array) if doc_k_array else []
+            doc_k_array = _kids(first_child_obj)
             
-            if doc_k_list and len(doc_k_list) > 0:
+            if len(doc_k_array) > 0:
                 results['document_has_children'] = True
                 results['structure_hierarchy'] = {
-                    'document_children_count': len(doc_k_list),
+                    'document_children_count': len(doc_k_array),
                     'first_child_type': None,
                     'sample_children_types': []
                 }
                 
                 # Get first child type
-                if doc_k_list:
-                    first_doc_child = doc_k_list[0]
-                    if hasattr(first_doc_child, 'objgen'):
-                        first_doc_child_obj = pdf.get_object(first_doc_child.objgen)
-                    else:
-                        first_doc_child_obj = first_doc_child
-                    if isinstance(first_doc_child_obj, pikepdf.Dictionary):
-                        first_doc_child_type = first_doc_child_obj.get('/S')
-                        results['structure_hierarchy']['first_child_type'] = str(first_doc_child_type) if first_doc_child_type else None
+                first_doc_child_obj = doc_k_array[0]
+                if isinstance(first_doc_child_obj, pikepdf.Dictionary):
+                    first_doc_child_type = first_doc_child_obj.get('/S')
+                    results['structure_hierarchy']['first_child_type'] = str(first_doc_child_type) if first_doc_child_type else None
                 
                 # Sample children types
-                for i, child in enumerate(doc_k_list[:10]):  # First 10 children
-                    if hasattr(child, 'objgen'):
-                        child_obj = pdf.get_object(child.objgen)
-                    else:
-                        child_obj = child
+                for i, child_obj in enumerate(doc_k_array[:10]):  # First 10 children
                     if isinstance(child_obj, pikepdf.Dictionary):
                         child_type = child_obj.get('/S')
                         results['structure_hierarchy']['sample_children_types'].append({
@@ -138,8 +140,9 @@ def test_document_wrapper(pdf_path):
             
     except Exception as e:
         results['issues'].append(f"ERROR: Test failed: {e}")
-        import traceback
-        traceback.print_exc(file=sys.stderr)
+        # The error is already in issues; the stack is only for debugging
+        if os.getenv('PDFUA_DEBUG'):
+            traceback.print_exc(file=sys.stderr)
     
     return results
 
@@ -156,8 +159,9 @@ def main():
     
     results = test_document_wrapper(pdf_path)
     
-    # Output JSON results
-    print(json.dumps(results, indent=2))
+    # Output JSON results, streamed straight to stdout
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
     
     # Exit with error code if test failed
     if not results['passed']:
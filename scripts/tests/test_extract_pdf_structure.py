@@ -0,0 +1,44 @@
+"""Tests for scripts/extract-pdf-structure.py"""
+
+import importlib.util
+from pathlib import Path
+
+import pikepdf
+from pikepdf import Array, Dictionary, Name
+
+SCRIPT = Path(__file__).resolve().parent.parent / 'extract-pdf-structure.py'
+spec = importlib.util.spec_from_file_location('extract_pdf_structure', SCRIPT)
+extract = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(extract)
+
+
+def _tagged_pdf(tmp_path, make_kids):
+    pdf = pikepdf.new()
+    pdf.add_blank_page()
+    pdf.add_blank_page()
+    root = pdf.make_indirect(Dictionary(Type=Name.StructTreeRoot))
+    document = pdf.make_indirect(Dictionary(Type=Name.StructElem, S=Name.Document, P=root))
+    document.K = Array([pdf.make_indirect(elem) for elem in make_kids(pdf)])
+    root.K = Array([document])
+    pdf.Root.StructTreeRoot = root
+    path = tmp_path / 'tagged.pdf'
+    pdf.save(path)
+    return str(path)
+
+
+def test_compact_integer_mcids_use_the_elements_page(tmp_path):
+    path = _tagged_pdf(tmp_path, lambda pdf: [
+        Dictionary(Type=Name.StructElem, S=Name.H1, Pg=pdf.pages[0].obj, K=Array([0])),
+        Dictionary(Type=Name.StructElem, S=Name.P, Pg=pdf.pages[1].obj, K=Array([1])),
+    ])
+    tree = extract.extract_structure_tree(path)['structureTree']
+    assert [(node['type'], node['mcid'], node['page']) for node in tree] == [('H1', 0, 1), ('P', 1, 2)]
+
+
+def test_mcr_dictionaries_still_give_mcid_and_page(tmp_path):
+    path = _tagged_pdf(tmp_path, lambda pdf: [
+        Dictionary(Type=Name.StructElem, S=Name.P, K=Array([
+            pdf.make_indirect(Dictionary(Type=Name.MCR, Pg=pdf.pages[1].obj, MCID=3))])),
+    ])
+    tree = extract.extract_structure_tree(path)['structureTree']
+    assert [(node['type'], node['mcid'], node['page']) for node in tree] == [('P', 3, 2)]
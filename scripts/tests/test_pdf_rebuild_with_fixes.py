@@ -0,0 +1,129 @@
+"""Tests for scripts/pdf-rebuild-with-fixes.py"""
+
+import importlib.util
+import json
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / 'pdf-rebuild-with-fixes.py'
+spec = importlib.util.spec_from_file_location('pdf_rebuild_with_fixes', SCRIPT)
+rebuild = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(rebuild)
+
+
+def _write_fixes(tmp_path, fixes):
+    path = tmp_path / 'fixes.json'
+    path.write_text(json.dumps({'fixes': fixes}))
+    return path
+
+
+def test_fixes_differing_only_in_image_index_are_kept(tmp_path):
+    fixes = [
+        {'type': 'altText', 'page': 1, 'altText': 'Logo', 'imageIndex': 0},
+        {'type': 'altText', 'page': 1, 'altText': 'Logo', 'imageIndex': 1},
+    ]
+    fixes_by_page, loaded, skipped = rebuild._load_fixes_by_page(_write_fixes(tmp_path, fixes))
+    assert (loaded, skipped) == (2, 0)
+    assert fixes_by_page == {0: fixes}
+
+
+def test_same_size_tables_and_same_text_headings_are_kept(tmp_path):
+    table = {'rows': [['', ''], ['', '']], 'summary': ''}
+    fixes = [
+        {'type': 'table', 'page': 2, 'tableData': table, 'readingOrder': 1},
+        {'type': 'table', 'page': 2, 'tableData': table, 'readingOrder': 2},
+        {'type': 'heading', 'page': 2, 'text': 'Notes', 'level': 2, 'readingOrder': 3},
+        {'type': 'heading', 'page': 2, 'text': 'Notes', 'level': 2, 'readingOrder': 4},
+    ]
+    fixes_by_page, loaded, skipped = rebuild._load_fixes_by_page(_write_fixes(tmp_path, fixes))
+    assert skipped == 0
+    assert fixes_by_page[1] == fixes
+
+
+def test_exact_duplicates_are_dropped_regardless_of_key_order(tmp_path):
+    fixes = [
+        {'type': 'heading', 'page': 1, 'text': 'Intro', 'level': 1},
+        {'level': 1, 'text': 'Intro', 'page': 1, 'type': 'heading'},
+        {'type': 'heading', 'page': 3, 'text': 'End', 'level': 1},
+    ]
+    fixes_by_page, loaded, skipped = rebuild._load_fixes_by_page(_write_fixes(tmp_path, fixes))
+    assert (loaded, skipped) == (3, 1)
+    assert fixes_by_page == {0: [fixes[0]], 2: [fixes[2]]}
+
+
+def test_walk_tree_handles_direct_struct_tree_root():
+    pdf = rebuild.pikepdf.new()
+    table = rebuild.Dictionary(S=rebuild.Name('/Table'), K=rebuild.Dictionary(S=rebuild.Name('/TR')))
+    pdf.Root.StructTreeRoot = rebuild.Dictionary(
+        Type=rebuild.Name('/StructTreeRoot'),
+        K=rebuild.Array([rebuild.Dictionary(S=rebuild.Name('/Part'), K=rebuild.Array([table]))]))
+    seen = []
+    rebuild._walk_tree(pdf, lambda elem: seen.append(str(elem.get('/S', ''))))
+    assert seen == ['', '/Part', '/Table', '/TR']
+
+
+class _FakeClaude:
+    """Stands in for the Anthropic client: fails any request that includes a 'bad' image"""
+
+    def __init__(self):
+        self.messages = self
+        self.calls = 0
+
+    def create(self, model, max_tokens, messages):
+        self.calls += 1
+        prompt = messages[0]['content']
+        images = json.loads(prompt.split('\n')[1])
+        if any(image['name'] == 'bad' for image in images):
+            raise RuntimeError('rejected')
+        reply = json.dumps({str(image['index']): f"alt {image['index']}" for image in images})
+        return type('Reply', (), {'content': [type('Block', (), {'text': reply})()]})()
+
+
+def test_failed_alt_text_batch_only_loses_the_failing_image():
+    batch = [{'index': i, 'page': 1, 'name': 'bad' if i == 2 else f'Im{i}', 'width': 1, 'height': 1}
+             for i in range(1, 5)]
+    client = _FakeClaude()
+    alt_texts = rebuild._request_batch_alt_texts(client, 'Doc', batch)
+    assert alt_texts == {'1': 'alt 1', '3': 'alt 3', '4': 'alt 4'}
+    assert client.calls == 1 + len(batch)
+
+
+def test_shared_annotation_is_tagged_once():
+    pdf = rebuild.pikepdf.new()
+    pdf.add_blank_page()
+    pdf.add_blank_page()
+    link = pdf.make_indirect(rebuild.Dictionary(Type=rebuild.Name('/Annot'), Subtype=rebuild.Name('/Link')))
+    pdf.pages[0].Annots = rebuild.Array([link, link])
+    pdf.pages[1].Annots = rebuild.Array([link])
+    pdf.Root.StructTreeRoot = pdf.make_indirect(rebuild.Dictionary(Type=rebuild.Name('/StructTreeRoot')))
+
+    rebuild.fix_annotation_tagging(pdf)
+
+    assert int(pdf.pages[0].Annots[0].StructParent) == 0
+    assert int(pdf.Root.StructTreeRoot.ParentTreeNextKey) == 1
+
+
+def test_rebuilt_tree_has_parent_tree_without_annotations():
+    pdf = rebuild.pikepdf.new()
+    pdf.add_blank_page()
+    builder = rebuild.StructureTreeBuilder(pdf)
+    builder.create_root()
+    builder.create_element('/P', 0, text='Body')
+    builder.finalize()
+
+    assert rebuild.fix_annotation_tagging(pdf) == 0
+
+    struct_root = pdf.Root.StructTreeRoot
+    assert list(struct_root.ParentTree.Nums) == []
+    assert int(struct_root.ParentTreeNextKey) == 0
+
+
+def test_heading_fix_accepts_float_level():
+    pdf = rebuild.pikepdf.new()
+    pdf.add_blank_page()
+    builder = rebuild.StructureTreeBuilder(pdf)
+    builder.create_root()
+    log_lines = []
+
+    rebuild._tag_heading_fix(builder, 0, {'type': 'heading', 'level': 2.0}, log_lines)
+
+    assert log_lines == ['  [OK] /H2: ']
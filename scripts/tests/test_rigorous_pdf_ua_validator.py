@@ -0,0 +1,74 @@
+"""Tests for scripts/rigorous-pdf-ua-validator.py"""
+
+import importlib.util
+from pathlib import Path
+
+import pikepdf
+
+SCRIPT = Path(__file__).resolve().parent.parent / 'rigorous-pdf-ua-validator.py'
+spec = importlib.util.spec_from_file_location('rigorous_pdf_ua_validator', SCRIPT)
+validator_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(validator_module)
+RigorousPDFUAValidator = validator_module.RigorousPDFUAValidator
+
+
+def _tagged_pdf(tmp_path):
+    pdf = pikepdf.new()
+    pdf.add_blank_page()
+    document = pikepdf.Dictionary(S=pikepdf.Name('/Document'), K=pikepdf.Array([]))
+    pdf.Root.StructTreeRoot = pdf.make_indirect(pikepdf.Dictionary(
+        Type=pikepdf.Name('/StructTreeRoot'), K=pikepdf.Array([document])))
+    path = tmp_path / 'tagged.pdf'
+    pdf.save(path)
+    return str(path)
+
+
+def _pass_check(name):
+    def check(self):
+        self._checks.append(validator_module.CheckResult(name, passed=True))
+    return check
+
+
+def test_quick_mode_skips_content_check_and_is_not_compliant(tmp_path, monkeypatch):
+    # Every check that runs passes, so only the skipped content check can fail the run
+    for check_name, method_name, _ in RigorousPDFUAValidator.CHECKS:
+        monkeypatch.setattr(RigorousPDFUAValidator, method_name, _pass_check(check_name))
+    opened = []
+    monkeypatch.setattr(validator_module.fitz, 'open', lambda *a, **k: opened.append(a))
+
+    results = RigorousPDFUAValidator(_tagged_pdf(tmp_path)).validate(quick=True)
+
+    content = results['checks']['Tagged Content']
+    assert content['passed'] is False
+    assert content['details'] == {'skipped': True}
+    assert results['compliant'] is False
+    assert opened == []
+
+
+def test_full_run_with_passing_checks_is_compliant(tmp_path, monkeypatch):
+    for check_name, method_name, _ in RigorousPDFUAValidator.CHECKS:
+        monkeypatch.setattr(RigorousPDFUAValidator, method_name, _pass_check(check_name))
+
+    results = RigorousPDFUAValidator(_tagged_pdf(tmp_path)).validate()
+
+    assert results['compliant'] is True
+    assert len(results['checks']) == len(RigorousPDFUAValidator.CHECKS)
+
+
+def test_untagged_pdf_still_reports_unlabeled_form_field(tmp_path):
+    pdf = pikepdf.new()
+    pdf.add_blank_page()
+    widget = pdf.make_indirect(pikepdf.Dictionary(
+        Type=pikepdf.Name('/Annot'), Subtype=pikepdf.Name('/Widget'),
+        Rect=pikepdf.Array([0, 0, 10, 10])))
+    pdf.pages[0].Annots = pdf.make_indirect(pikepdf.Array([widget]))
+    pdf.Root.AcroForm = pikepdf.Dictionary(Fields=pikepdf.Array([widget]))
+    path = tmp_path / 'untagged.pdf'
+    pdf.save(path)
+
+    results = RigorousPDFUAValidator(str(path)).validate(quick=True)
+
+    alt_text = results['checks']['Other Elements Alternate Text']
+    assert alt_text['passed'] is False
+    assert 'Form field on page 1 missing label' in alt_text['failures']
+    assert results['checks']['Tab Order']['details'] == {'skipped': True}